@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+fp_accuracy.py - measure the accuracy cost of the truncating FP32 datapath
+
+The RTL (see the HW-like helpers in gen_mv_hex.py) truncates mant_norm[29:7] and
+aligns addends with a plain >> (no guard / sticky bits). This tool runs millions of
+random operands through vectorized re-implementations of
+
+  fp32_mul          a * b
+  fp32_addsub       a +/- b
+  mv_mul_4x4_fp32   one output row: (m0*v0 + m1*v1) + (m2*v2 + m3*v3)
+  fast_inv_sqrt     y0 = MAGIC - (x >> 1); y = y0 * (1.5 - (x * 0.5) * (y0 * y0))
+
+and compares them with the same operation sequence in IEEE fp32 round-to-nearest-even
+(numpy float32). For the multi-op units the HW and IEEE results are also compared
+with the correctly rounded exact value (float64), which shows how much of the error
+rounding would actually remove.
+
+Errors are signed ULP distances in fp32 ordinal space (hw - ref). "bias" is the mean
+error in the magnitude direction (negative = towards zero, the truncation signature).
+Results whose reference is not a normal fp32 (the RTL has no Inf / denorm handling)
+are counted as out-of-range and excluded.
+
+Work is split into fixed-size chunks; each chunk draws its operands from its own
+seeded generator, so results are reproducible for any worker count.
+
+Usage:
+  python3 fp_accuracy.py                              # 4M samples per unit, all CPUs
+  python3 fp_accuracy.py --n 16000000 --ops mul add --workers 8
+  python3 fp_accuracy.py --check 20000                # cross-check against gen_mv_hex.py first
+  python3 fp_accuracy.py --json fp_accuracy.json
+"""
+
+import argparse
+import json
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+
+OPS = ("mul", "add", "mv", "inv_sqrt")
+MAGIC = 0x5F3759DF
+FP32_HALF = 0x3F000000
+FP32_THREEHALFS = 0x3FC00000
+
+# |ulp| histogram buckets: [lo, hi)
+BUCKETS = (0, 1, 2, 3, 5, 9, 17, 257)
+BUCKET_LABELS = ("0", "1", "2", "3-4", "5-8", "9-16", "17-256", ">256")
+TOP_K = 5
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+
+
+# -----------------------------
+# Vectorized HW-like arithmetic (uint64 arrays holding fp32 bit patterns)
+# same rules as fp32_mul_trunc_hw / fp32_addsub_trunc_hw in gen_mv_hex.py
+# -----------------------------
+def _unpack(u):
+    u = u.astype(np.int64)
+    return (u >> 31) & 1, (u >> 23) & 0xFF, u & 0x7FFFFF
+
+
+def _pack(s, e, f):
+    return (((s & 1) << 31) | ((e & 0xFF) << 23) | (f & 0x7FFFFF)).astype(np.uint64)
+
+
+def fp32_mul_trunc_vec(a, b):
+    sa, ea_raw, fa = _unpack(a)
+    sb, eb_raw, fb = _unpack(b)
+    sign = sa ^ sb
+    any_zero = ((ea_raw == 0) & (fa == 0)) | ((eb_raw == 0) & (fb == 0))
+
+    ea = np.where(ea_raw == 0, 1, ea_raw)
+    eb = np.where(eb_raw == 0, 1, eb_raw)
+    ma = np.where(ea_raw == 0, fa, fa | (1 << 23))
+    mb = np.where(eb_raw == 0, fb, fb | (1 << 23))
+
+    prod = ma * mb                      # < 2^48, fits in int64
+    top = (prod >> 47) & 1
+    mant_norm = np.where(top == 1, prod >> 17, prod >> 16) & 0x7FFFFFFF
+    exp_norm = ea + eb - 127 + top
+
+    out = _pack(sign, exp_norm, mant_norm >> 7)
+    return np.where(any_zero | (prod == 0), _pack(sign, 0, 0), out)
+
+
+def fp32_addsub_trunc_vec(sub, a, b):
+    sa, ea_raw, fa = _unpack(a)
+    sb, eb_raw, fb = _unpack(b)
+    sb_eff = sb ^ (np.asarray(sub, dtype=np.int64) & 1)
+
+    ea = np.where(ea_raw == 0, 1, ea_raw)
+    eb = np.where(eb_raw == 0, 1, eb_raw)
+    mant_a = (np.where(ea_raw == 0, 0, 1 << 23) | fa) << 7
+    mant_b = (np.where(eb_raw == 0, 0, 1 << 23) | fb) << 7
+
+    # align (NO sticky); shifts >= 32 clear the 32-bit operand
+    a_big = ea > eb
+    exp_res = np.maximum(ea, eb)
+    diff = np.minimum(np.abs(ea - eb), 40)
+    mant_a_al = np.where(a_big, mant_a, mant_a >> diff)
+    mant_b_al = np.where(a_big, mant_b >> diff, mant_b)
+
+    same = sa == sb_eff
+    mant_sub = (mant_a_al - mant_b_al) & 0xFFFFFFFF
+    neg = ((mant_sub >> 31) & 1) == 1
+    mant = np.where(same, (mant_a_al + mant_b_al) & 0xFFFFFFFF,
+                    np.where(neg, (-mant_sub) & 0xFFFFFFFF, mant_sub))
+    sign = np.where(same, sa, np.where(neg, sb_eff, sa))
+
+    # normalize: bit 31 -> shift right, else shift the leading one up to bit 30
+    top = ((mant >> 31) & 1) == 1
+    msb = np.frexp(mant.astype(np.float64))[1] - 1     # exact for < 2^53
+    lz = np.clip(30 - msb, 0, 31)
+    mant_norm = np.where(top, mant >> 1, (mant << lz) & 0xFFFFFFFF)
+    exp_norm = np.where(top, exp_res + 1, exp_res - lz)
+
+    out = _pack(sign, exp_norm, mant_norm >> 7)
+    return np.where(mant == 0, np.uint64(0), out)
+
+
+def mv_row_trunc_vec(m, v):
+    """m, v: (K, 4) bit patterns -> one mv_mul_4x4_fp32 output row per sample"""
+    p = [fp32_mul_trunc_vec(m[:, c], v[:, c]) for c in range(4)]
+    a0 = fp32_addsub_trunc_vec(0, p[0], p[1])
+    a1 = fp32_addsub_trunc_vec(0, p[2], p[3])
+    return fp32_addsub_trunc_vec(0, a0, a1)
+
+
+def fast_inv_sqrt_trunc_vec(x):
+    y0 = (MAGIC - (x >> 1)) & _MASK32
+    half = np.full_like(x, FP32_HALF)
+    x2 = fp32_mul_trunc_vec(x, half)
+    yy = fp32_mul_trunc_vec(y0, y0)
+    t2 = fp32_mul_trunc_vec(x2, yy)
+    t3 = fp32_addsub_trunc_vec(1, np.full_like(x, FP32_THREEHALFS), t2)
+    return fp32_mul_trunc_vec(y0, t3)
+
+
+# -----------------------------
+# IEEE fp32 (round-to-nearest-even) references
+# -----------------------------
+def _f32(u):
+    return u.astype(np.uint32).view(np.float32)
+
+
+def _u(x):
+    return np.asarray(x, dtype=np.float32).view(np.uint32).astype(np.uint64)
+
+
+def mv_row_ieee(m, v):
+    mf, vf = _f32(m), _f32(v)
+    p = mf * vf
+    return _u((p[:, 0] + p[:, 1]) + (p[:, 2] + p[:, 3]))
+
+
+def mv_row_exact(m, v):
+    return _u((_f32(m).astype(np.float64) * _f32(v).astype(np.float64)).sum(axis=1).astype(np.float32))
+
+
+def fast_inv_sqrt_ieee(x):
+    y0 = _f32((MAGIC - (x >> 1)) & _MASK32)
+    xf = _f32(x)
+    t2 = (xf * np.float32(0.5)) * (y0 * y0)
+    return _u(y0 * (np.float32(1.5) - t2))
+
+
+def inv_sqrt_exact(x):
+    return _u((1.0 / np.sqrt(_f32(x).astype(np.float64))).astype(np.float32))
+
+
+# -----------------------------
+# Operands
+# -----------------------------
+def rand_f32_bits(rng, shape, exp_span, positive=False):
+    """finite normal fp32 with exponent in [-exp_span, exp_span] and uniform mantissa"""
+    e = rng.integers(127 - exp_span, 127 + exp_span + 1, size=shape, dtype=np.int64)
+    f = rng.integers(0, 1 << 23, size=shape, dtype=np.int64)
+    s = np.zeros(shape, dtype=np.int64) if positive else rng.integers(0, 2, size=shape, dtype=np.int64)
+    return _pack(s, e, f)
+
+
+# -----------------------------
+# Statistics
+# -----------------------------
+def ulp_error(hw, ref):
+    """signed ULP distance hw - ref in fp32 ordinal space (+0 == -0)"""
+    def ordinal(u):
+        u = u.astype(np.int64)
+        mag = u & 0x7FFFFFFF
+        return np.where((u >> 31) & 1, -mag, mag)
+    return ordinal(hw) - ordinal(ref)
+
+
+def _in_range(ref):
+    e = (ref.astype(np.int64) >> 23) & 0xFF
+    return (e != 0xFF) & ((e != 0) | ((ref & np.uint64(0x7FFFFFFF)) == 0))
+
+
+def _worst_key(w):
+    # ties broken by the operands so the result does not depend on chunk completion order
+    return -w[0], w[2]
+
+
+class ErrStats:
+    def __init__(self):
+        self.count = 0
+        self.out_of_range = 0
+        self.hist = np.zeros(len(BUCKETS), dtype=np.int64)
+        self.sum_err = 0
+        self.sum_bias = 0
+        self.sum_abs = 0
+        self.sum_rel = 0.0
+        self.max_abs = 0
+        self.worst = []     # [(|err|, err, inputs (hex), got, ref)]
+
+    def add(self, hw, ref, inputs):
+        """hw: results under test, ref: reference results, inputs: (K, n_in) operand bits"""
+        ok = _in_range(ref)
+        self.out_of_range += int((~ok).sum())
+        hw, ref, inputs = hw[ok], ref[ok], inputs[ok]
+        if len(hw) == 0:
+            return
+        err = ulp_error(hw, ref)
+        ref_neg = ((ref >> np.uint64(31)) & np.uint64(1)).astype(bool)
+        bias = np.where(ref_neg, -err, err)
+        abs_err = np.abs(err)
+        ref_f = _f32(ref).astype(np.float64)
+        hw_f = _f32(hw).astype(np.float64)
+        nz = ref_f != 0.0
+
+        self.count += len(err)
+        self.hist += np.bincount(np.searchsorted(BUCKETS, abs_err, side="right") - 1, minlength=len(BUCKETS))
+        self.sum_err += int(err.sum())
+        self.sum_bias += int(bias.sum())
+        self.sum_abs += int(abs_err.sum())
+        self.sum_rel += float(np.sum((np.abs(hw_f[nz]) - np.abs(ref_f[nz])) / np.abs(ref_f[nz])))
+        self.max_abs = max(self.max_abs, int(abs_err.max()))
+
+        for i in np.argsort(abs_err)[::-1][:TOP_K]:
+            self.worst.append((int(abs_err[i]), int(err[i]), [f"{int(w):08x}" for w in inputs[i]],
+                               f"{int(hw[i]):08x}", f"{int(ref[i]):08x}"))
+        self.worst = sorted(self.worst, key=_worst_key)[:TOP_K]
+
+    def merge(self, other):
+        self.count += other.count
+        self.out_of_range += other.out_of_range
+        self.hist += other.hist
+        self.sum_err += other.sum_err
+        self.sum_bias += other.sum_bias
+        self.sum_abs += other.sum_abs
+        self.sum_rel += other.sum_rel
+        self.max_abs = max(self.max_abs, other.max_abs)
+        self.worst = sorted(self.worst + other.worst, key=_worst_key)[:TOP_K]
+
+    def summary(self) -> dict:
+        n = max(self.count, 1)
+        return {
+            "samples": self.count,
+            "out_of_range": self.out_of_range,
+            "exact_frac": float(self.hist[0]) / n,
+            "mean_ulp": self.sum_err / n,
+            "bias_ulp": self.sum_bias / n,
+            "mean_abs_ulp": self.sum_abs / n,
+            "mean_rel_mag_err": self.sum_rel / n,
+            "max_abs_ulp": self.max_abs,
+            "hist": {label: int(c) for label, c in zip(BUCKET_LABELS, self.hist)},
+            "worst": [{"abs_ulp": w[0], "ulp": w[1], "inputs": w[2], "got": w[3], "ref": w[4]}
+                      for w in self.worst],
+        }
+
+
+# -----------------------------
+# Chunk workers
+# -----------------------------
+def run_chunk(task):
+    """task = (op, chunk_index, n, seed, exp_span) -> (op, {comparison name: ErrStats})"""
+    op, idx, n, seed, exp_span = task
+    rng = np.random.default_rng([seed, OPS.index(op), idx])
+    out = {}
+
+    def record(name, hw, ref, inputs):
+        out.setdefault(name, ErrStats()).add(hw, ref, inputs)
+
+    with np.errstate(over="ignore", under="ignore", invalid="ignore", divide="ignore"):
+        if op == "mul":
+            a, b = rand_f32_bits(rng, n, exp_span), rand_f32_bits(rng, n, exp_span)
+            record("fp32_mul: hw vs ieee", fp32_mul_trunc_vec(a, b), _u(_f32(a) * _f32(b)),
+                   np.stack([a, b], axis=1))
+        elif op == "add":
+            a, b = rand_f32_bits(rng, n, exp_span), rand_f32_bits(rng, n, exp_span)
+            sub = rng.integers(0, 2, size=n, dtype=np.int64)
+            ref = _u(np.where(sub == 1, _f32(a) - _f32(b), _f32(a) + _f32(b)))
+            record("fp32_addsub: hw vs ieee", fp32_addsub_trunc_vec(sub, a, b), ref,
+                   np.stack([sub.astype(np.uint64), a, b], axis=1))
+        elif op == "mv":
+            m, v = rand_f32_bits(rng, (n, 4), exp_span), rand_f32_bits(rng, (n, 4), exp_span)
+            hw, ieee, exact = mv_row_trunc_vec(m, v), mv_row_ieee(m, v), mv_row_exact(m, v)
+            inputs = np.concatenate([m, v], axis=1)
+            record("mv_mul_4x4 row: hw vs ieee tree", hw, ieee, inputs)
+            record("mv_mul_4x4 row: hw vs exact", hw, exact, inputs)
+            record("mv_mul_4x4 row: ieee tree vs exact", ieee, exact, inputs)
+        elif op == "inv_sqrt":
+            x = rand_f32_bits(rng, n, exp_span, positive=True)
+            hw, ieee, exact = fast_inv_sqrt_trunc_vec(x), fast_inv_sqrt_ieee(x), inv_sqrt_exact(x)
+            inputs = x[:, None]
+            record("fast_inv_sqrt: hw vs ieee (same algorithm)", hw, ieee, inputs)
+            record("fast_inv_sqrt: hw vs exact", hw, exact, inputs)
+            record("fast_inv_sqrt: ieee vs exact", ieee, exact, inputs)
+        else:
+            raise ValueError(f"unknown op {op}")
+    return op, out
+
+
+def analyze(ops, n, seed, exp_span, chunk_size=1 << 18, workers=None):
+    tasks = []
+    for op in ops:
+        for idx, start in enumerate(range(0, n, chunk_size)):
+            tasks.append((op, idx, min(chunk_size, n - start), seed, exp_span))
+
+    totals = {}
+    rank = {}
+
+    def merge(res):
+        op, comparisons = res
+        for i, (name, st) in enumerate(comparisons.items()):
+            rank.setdefault(name, (OPS.index(op), i))
+            if name in totals:
+                totals[name].merge(st)
+            else:
+                totals[name] = st
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for t in tasks:
+            merge(run_chunk(t))
+    else:
+        with mp.Pool(workers) as pool:
+            for res in pool.imap_unordered(run_chunk, tasks):
+                merge(res)
+    # stable order independent of chunk completion order
+    return {name: totals[name].summary() for name in sorted(totals, key=rank.get)}
+
+
+# -----------------------------
+# Cross-check against the scalar golden model
+# -----------------------------
+def check_against_golden(n, seed, exp_span):
+    import gen_mv_hex as g
+    np.seterr(all="ignore")     # gen_mv_hex raises on fp errors at import time
+
+    rng = np.random.default_rng([seed, 0xC0DE])
+    a, b = rand_f32_bits(rng, n, exp_span), rand_f32_bits(rng, n, exp_span)
+    sub = rng.integers(0, 2, size=n, dtype=np.int64)
+    mul_v = fp32_mul_trunc_vec(a, b)
+    add_v = fp32_addsub_trunc_vec(sub, a, b)
+    bad = 0
+    for i in range(n):
+        ai, bi = int(a[i]), int(b[i])
+        if g.fp32_mul_trunc_hw(ai, bi) != int(mul_v[i]):
+            bad += 1
+        if g.fp32_addsub_trunc_hw(int(sub[i]), ai, bi) != int(add_v[i]):
+            bad += 1
+
+    m, v = rand_f32_bits(rng, (n // 4, 4), exp_span), rand_f32_bits(rng, (n // 4, 4), exp_span)
+    rows = mv_row_trunc_vec(m, v)
+    for i in range(n // 4):
+        M = np.zeros((4, 4), dtype=np.float32)
+        M[0] = _f32(m[i])
+        if g.mv4x4_fp32_trunc_hw(M, _f32(v[i]))[0] != int(rows[i]):
+            bad += 1
+    if bad:
+        raise SystemExit(f"[FAIL] vectorized model disagrees with gen_mv_hex.py on {bad} samples")
+    print(f"[OK] vectorized model matches gen_mv_hex.py on {n} mul / {n} addsub / {n // 4} mv samples")
+
+
+# -----------------------------
+# Report
+# -----------------------------
+def print_report(results):
+    for name, r in results.items():
+        print(f"== {name}")
+        print(f"   samples {r['samples']}  (out of range {r['out_of_range']})  exact {r['exact_frac']:.2%}")
+        print(f"   mean ulp {r['mean_ulp']:+.4f}  bias (magnitude) {r['bias_ulp']:+.4f}  "
+              f"mean |ulp| {r['mean_abs_ulp']:.4f}  max |ulp| {r['max_abs_ulp']}  "
+              f"mean rel {r['mean_rel_mag_err']:+.3e}")
+        total = max(r["samples"], 1)
+        print("   |ulp| " + "  ".join(f"{k}:{v / total:.2%}" for k, v in r["hist"].items()))
+        for w in r["worst"][:3]:
+            print(f"   worst {w['ulp']:+d} ulp: inputs {' '.join(w['inputs'])} -> {w['got']} (ref {w['ref']})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="accuracy of the truncating FP32 units vs IEEE round-to-nearest")
+    ap.add_argument("--ops", nargs="+", choices=OPS, default=list(OPS))
+    ap.add_argument("--n", type=int, default=4_000_000, help="samples per unit")
+    ap.add_argument("--seed", type=int, default=20251219)
+    ap.add_argument("--exp-span", type=int, default=8,
+                    help="operand exponents are drawn from [-span, span] (keeps results normal)")
+    ap.add_argument("--chunk-size", type=int, default=1 << 18)
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--check", type=int, default=0,
+                    help="first cross-check N samples against the scalar model in gen_mv_hex.py")
+    ap.add_argument("--json", type=str, default=None, help="also write the results to this file")
+    args = ap.parse_args()
+
+    if args.check:
+        check_against_golden(args.check, args.seed, args.exp_span)
+
+    t0 = time.perf_counter()
+    results = analyze(args.ops, args.n, args.seed, args.exp_span, args.chunk_size, args.workers)
+    print_report(results)
+    print(f"[OK] {args.n} samples per unit in {time.perf_counter() - t0:.1f}s")
+
+    if args.json:
+        params = {k: getattr(args, k) for k in ("ops", "n", "seed", "exp_span")}
+        with open(args.json, "w") as f:
+            json.dump({"params": params, "results": results}, f, indent=2)
+        print("[OK] wrote", args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
+import argparse
 import numpy as np
 import random
 from pathlib import Path
 
+import vecfile
+from vecfile import write_vec
+from vec_cache import VecCache, add_cache_args
+
 np.seterr(over="raise", invalid="raise", divide="raise")
 
 # -----------------------------
@@ -190,6 +195,35 @@ def make_tests(n=100, seed=0x1234, val_range=(-2.0, 2.0)):
 
     return tests
 
+def make_stream_tests(n_matrices=4, verts_per_matrix=64, seed=0x1234, val_range=(-2.0, 2.0)):
+    """
+    Streaming layout: one matrix load (m_valid) followed by verts_per_matrix
+    vertices (in_valid), matching how mv_mul_4x4_fp32 is used in the real pipeline.
+    Returns [(M, [(v, out_u32), ...]), ...]
+    """
+    random.seed(seed)
+    groups = []
+    lo, hi = val_range
+
+    edge_pool = [
+        np.float32(0.0), np.float32(-0.0), np.float32(1.0), np.float32(-1.0),
+        np.float32(2.0), np.float32(0.5), np.float32(3.1415926),
+        np.float32(1e-3), np.float32(1e3),
+    ]
+
+    def pick():
+        return random.choice(edge_pool) if random.random() < 0.1 else rand_f32(lo, hi)
+
+    for _ in range(n_matrices):
+        M = [[pick() for _ in range(4)] for _ in range(4)]
+        verts = []
+        for _ in range(verts_per_matrix):
+            v = [pick() for _ in range(4)]
+            verts.append((v, mv4x4_fp32_trunc_hw(M, v)))
+        groups.append((M, verts))
+
+    return groups
+
 # -----------------------------
 # Write .hex (one 32-bit word per line)
 # -----------------------------
@@ -199,13 +233,21 @@ def write_hex_words(path: Path, words):
         for w in words:
             f.write(f"{w & 0xFFFFFFFF:08x}\n")
 
-def main():
-    N = 50
-    SEED = 20251219
-    OUTDIR = Path("out_hex")
-    OUTDIR.mkdir(exist_ok=True)
+MV_FIELDS = [f"m{r}{c}" for r in range(4) for c in range(4)]
+V_FIELDS = ["vx", "vy", "vz", "vw"]
+OUT_FIELDS = ["ox", "oy", "oz", "ow"]
 
-    tests = make_tests(n=N, seed=SEED, val_range=(-2.0, 2.0))
+def write_words(path: Path, words, fmt: str, **vec_meta):
+    # fmt "hex": $readmemh text; fmt "vec": binary container (vecfile.py)
+    if fmt == "vec":
+        path = path.with_suffix(".vec")
+        write_vec(path, words, **vec_meta)
+    else:
+        write_hex_words(path, words)
+    return path
+
+def write_case_mode(outdir: Path, n: int, seed: int, fmt: str = "hex"):
+    tests = make_tests(n=n, seed=seed, val_range=(-2.0, 2.0))
 
     in_words = []
     out_words = []
@@ -222,15 +264,108 @@ def main():
         for r in range(4):
             out_words.append(out_u32[r])
 
-    write_hex_words(OUTDIR / "mv_in.hex", in_words)
-    write_hex_words(OUTDIR / "mv_out.hex", out_words)
+    params = {"mode": "case", "n": n, "val_range": [-2.0, 2.0]}
+    in_path = write_words(outdir / "mv_in.hex", in_words, fmt, layout="mv_in.case", record_words=20,
+                          seed=seed, fields=MV_FIELDS + V_FIELDS, params=params)
+    out_path = write_words(outdir / "mv_out.hex", out_words, fmt, layout="mv_out", record_words=4,
+                           seed=seed, fields=OUT_FIELDS, params=params)
 
     print("Generated (HW-trunc golden, NO id):")
-    print(f"  {OUTDIR/'mv_in.hex'}  ({len(in_words)} words = {N} cases * 20)")
-    print(f"  {OUTDIR/'mv_out.hex'} ({len(out_words)} words = {N} cases * 4)")
+    print(f"  {in_path}  ({len(in_words)} words = {n} cases * 20)")
+    print(f"  {out_path} ({len(out_words)} words = {n} cases * 4)")
     print("Format:")
     print("  mv_in.hex : m00..m33, vx,vy,vz,vw (20 lines per case)")
     print("  mv_out.hex: ox,oy,oz,ow           (4 lines per case)")
 
+def write_stream_mode(outdir: Path, n_matrices: int, verts_per_matrix: int, seed: int, fmt: str = "hex"):
+    groups = make_stream_tests(n_matrices=n_matrices, verts_per_matrix=verts_per_matrix,
+                               seed=seed, val_range=(-2.0, 2.0))
+
+    # header (2 words): n_matrices, verts_per_matrix
+    in_words = [n_matrices, verts_per_matrix]
+    out_words = []
+
+    for (M, verts) in groups:
+        # per group: m00..m33 (row-major), then verts_per_matrix * (vx,vy,vz,vw)
+        for r in range(4):
+            for c in range(4):
+                in_words.append(f32_to_u32(np.float32(M[r][c])))
+        for (v, out_u32) in verts:
+            for i in range(4):
+                in_words.append(f32_to_u32(np.float32(v[i])))
+            for r in range(4):
+                out_words.append(out_u32[r])
+
+    n_verts = n_matrices * verts_per_matrix
+    record_words = len(MV_FIELDS) + len(V_FIELDS) * verts_per_matrix
+    params = {"mode": "stream", "n_matrices": n_matrices, "verts_per_matrix": verts_per_matrix,
+              "val_range": [-2.0, 2.0]}
+    # stream record = one matrix group: MV_FIELDS, then V_FIELDS repeated vpm times
+    # (header size stays constant; VecFile consumers parse it from vpm / record_words)
+    layout_meta = {"prefix_fields": ["n_matrices", "verts_per_matrix"], "record_words": record_words,
+                   "vpm": verts_per_matrix}
+    in_path = write_words(outdir / "mv_stream_in.hex", in_words, fmt, layout="mv_in.stream",
+                          prefix_words=2, record_words=record_words, seed=seed,
+                          fields=MV_FIELDS + V_FIELDS, params=dict(params, **layout_meta))
+    out_path = write_words(outdir / "mv_stream_out.hex", out_words, fmt, layout="mv_out", record_words=4,
+                           seed=seed, fields=OUT_FIELDS, params=params)
+
+    print("Generated streaming layout (HW-trunc golden, NO id):")
+    print(f"  {in_path}  ({len(in_words)} words = 2 + "
+          f"{n_matrices} matrices * (16 + {verts_per_matrix} * 4))")
+    print(f"  {out_path} ({len(out_words)} words = {n_verts} vertices * 4)")
+    print("Format:")
+    print("  mv_stream_in.hex : n_matrices, verts_per_matrix,")
+    print("                     then per matrix: m00..m33, verts_per_matrix * (vx,vy,vz,vw)")
+    print("  mv_stream_out.hex: ox,oy,oz,ow (4 lines per vertex)")
+    print(f"  stimulus words per vertex: {len(in_words) / n_verts:.2f} (case mode: 20)")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["case", "stream"], default="case",
+                    help="case: new matrix with every vector (20 words/case); "
+                         "stream: one matrix load per group of vertices (top_tb +define+STREAM)")
+    ap.add_argument("--n", type=int, default=50, help="number of cases (case mode)")
+    ap.add_argument("--n-matrices", type=int, default=4, help="number of matrix loads (stream mode)")
+    ap.add_argument("--verts-per-matrix", type=int, default=64, help="vertices per matrix (stream mode)")
+    ap.add_argument("--seed", type=int, default=20251219, help="random seed")
+    ap.add_argument("--outdir", type=str, default="out_hex", help="output directory")
+    ap.add_argument("--format", choices=["hex", "vec"], default="hex",
+                    help="hex: $readmemh text; vec: binary container (convert with vecfile.py tohex)")
+    add_cache_args(ap)
+    args = ap.parse_args()
+
+    OUTDIR = Path(args.outdir)
+    OUTDIR.mkdir(parents=True, exist_ok=True)
+
+    if args.mode == "stream":
+        names = ["mv_stream_in", "mv_stream_out"]
+        params = {"mode": "stream", "n_matrices": args.n_matrices,
+                  "verts_per_matrix": args.verts_per_matrix, "seed": args.seed}
+        builders = [make_stream_tests, write_stream_mode]
+    else:
+        names = ["mv_in", "mv_out"]
+        params = {"mode": "case", "n": args.n, "seed": args.seed}
+        builders = [make_tests, write_case_mode]
+    names = [f"{n}.{args.format}" for n in names]
+    params.update(generator="gen_mv_hex", format=args.format)
+
+    # cache key: parameters + golden model / stimulus / writer source
+    cache = None if args.no_cache else VecCache(args.cache_dir, args.cache_max_mb)
+    if cache is not None:
+        key = cache.key(params, [f32_to_u32, u32_to_f32, _unpack, _pack,
+                                 fp32_mul_trunc_hw, fp32_addsub_trunc_hw, mv4x4_fp32_trunc_hw,
+                                 rand_f32, write_hex_words, write_words, vecfile] + builders)
+        if not args.force and cache.fetch(key, OUTDIR, names):
+            return
+
+    if args.mode == "stream":
+        write_stream_mode(OUTDIR, args.n_matrices, args.verts_per_matrix, args.seed, args.format)
+    else:
+        write_case_mode(OUTDIR, args.n, args.seed, args.format)
+
+    if cache is not None:
+        cache.store(key, OUTDIR, names)
+
 if __name__ == "__main__":
     main()
@@ -24,13 +24,22 @@ Golden output:
   N
   Records (repeat N):
     Px, Py, 1/Pz, Brightness : 4 * fp32
+
+--float-format (bf16, fp16, eXmY, ... see sw/floatfmt.py) emulates a narrower datapath:
+inputs and every intermediate result are quantized to that format (words stay fp32
+containers), and the output error vs the IEEE fp32 golden is printed.
 """
 
 import argparse
 import struct
+import sys
 from pathlib import Path
 import numpy as np
 
+import vecfile
+from vecfile import write_vec
+from vec_cache import VecCache, add_cache_args
+
 
 def f32(x) -> np.float32:
     return np.float32(x)
@@ -155,6 +164,43 @@ def build_random(n: int, seed: int):
             ids, Vx, Vy, Vz, Vw, Nvec)
 
 
+def load_float_format(spec: str, rounding: str):
+    # the format emulator lives with the software renderer (sw/floatfmt.py)
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "sw"))
+    import floatfmt
+    fmt = floatfmt.parse_format(spec, rounding)
+    if fmt.exp_bits > 8 or fmt.man_bits > 23:
+        raise SystemExit(f"--float-format {spec}: must fit in an fp32 container (exp <= 8, mantissa <= 23 bits)")
+    return fmt, floatfmt
+
+
+def golden_fmt(fmt, M, Pscale_x, Pscale_y, Lp, Ld, Lp_intensity, Ld_intensity, La_intensity,
+               Vx, Vy, Vz, Vw, Nvec):
+    """Same spec as the fp32 golden loop, vectorized over vertices, every op rounded to fmt"""
+    V = np.stack([Vx, Vy, Vz, Vw], axis=1).astype(np.float64)
+    Vp = fmt.mv(M.astype(np.float64), V)
+
+    z = Vp[:, 2]
+    invPz = fmt.inv_sqrt(fmt.mul(z, z))
+
+    Px = fmt.mul(fmt.mul(Vp[:, 0], Pscale_x), invPz)
+    Py = fmt.mul(fmt.mul(Vp[:, 1], Pscale_y), invPz)
+
+    Lp_prime = fmt.sub(Lp.astype(np.float64), Vp[:, :3])
+    tiny = fmt.dot3(Lp_prime, Lp_prime) < 1e-12
+    Lp_prime[tiny] = (0.0, 0.0, 1.0)
+    Lp_hat = fmt.normalize3(Lp_prime)
+    Ld_hat = fmt.normalize3(Ld.astype(np.float64))
+    N_hat = fmt.normalize3(Nvec.astype(np.float64))
+
+    # same accumulation order as the SW emulation (sw/floatfmt.py, already on sys.path via load_float_format)
+    from floatfmt import accumulate_brightness
+    Brightness = accumulate_brightness(N_hat, [Lp_hat, Ld_hat], [Lp_intensity, Ld_intensity], La_intensity, fmt)
+
+    out = np.stack([Px, Py, invPz, Brightness], axis=1).astype(np.float32)
+    return [tuple(row) for row in out]
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--mode", choices=["random", "fixed3"], default="random",
@@ -162,10 +208,36 @@ def main():
     ap.add_argument("--n", type=int, default=256, help="number of vertices (random mode only)")
     ap.add_argument("--seed", type=int, default=0, help="random seed (random mode only)")
     ap.add_argument("--outdir", type=str, default=".", help="output directory")
+    ap.add_argument("--format", choices=["hex", "vec"], default="hex",
+                    help="hex: $readmemh text; vec: binary container (convert with vecfile.py tohex)")
+    ap.add_argument("--float-format", type=str, default=None,
+                    help="emulate a narrower datapath: fp32, fp24, tf32, fp16, bf16 or eXmY (default: IEEE fp32)")
+    ap.add_argument("--float-round", choices=["nearest", "trunc"], default="nearest",
+                    help="rounding of the emulated float format")
+    add_cache_args(ap)
     args = ap.parse_args()
 
     outdir = Path(args.outdir)
     outdir.mkdir(parents=True, exist_ok=True)
+    fmt = floatfmt = None
+    if args.float_format:
+        fmt, floatfmt = load_float_format(args.float_format, args.float_round)
+
+    # cache key: parameters + golden model / stimulus source (main holds the golden loop)
+    names = [f"input.{args.format}", f"golden_output.{args.format}"]
+    params = {"generator": "gen_vtx", "mode": args.mode, "format": args.format}
+    if args.mode == "random":
+        params.update(n=args.n, seed=args.seed)
+    sources = [f32, f32_to_u32, hex8, dot3, inv_sqrt_soft, vec_norm3, clamp0,
+               mat4_mul_vec4, build_fixed3, build_random, main, vecfile]
+    if fmt is not None:
+        params.update(float_format=fmt.label, exp_bits=fmt.exp_bits, man_bits=fmt.man_bits)
+        sources += [golden_fmt, floatfmt]
+    cache = None if args.no_cache else VecCache(args.cache_dir, args.cache_max_mb)
+    if cache is not None:
+        key = cache.key(params, sources)
+        if not args.force and cache.fetch(key, outdir, names):
+            return
 
     if args.mode == "fixed3":
         (M, Pscale_x, Pscale_y, Lp, Ld, Lp_intensity, Ld_intensity, La_intensity,
@@ -176,6 +248,13 @@ def main():
          ids, Vx, Vy, Vz, Vw, Nvec) = build_random(args.n, args.seed)
         Nverts = int(args.n)
 
+    if fmt is not None:
+        # inputs must be representable in the emulated format
+        q = lambda x: fmt.quantize(x).astype(np.float32)
+        M, Pscale_x, Pscale_y, Lp, Ld = q(M), q(Pscale_x), q(Pscale_y), q(Lp), q(Ld)
+        Lp_intensity, Ld_intensity, La_intensity = q(Lp_intensity), q(Ld_intensity), q(La_intensity)
+        Vx, Vy, Vz, Vw, Nvec = q(Vx), q(Vy), q(Vz), q(Vw), q(Nvec)
+
     # Precompute normalized Ld for reference
     Ld_hat = vec_norm3(Ld)
 
@@ -207,55 +286,82 @@ def main():
 
         golden.append((Px, Py, invPz, Brightness))
 
+    if fmt is not None:
+        ieee = np.array(golden, dtype=np.float64)
+        golden = golden_fmt(fmt, M, Pscale_x, Pscale_y, Lp, Ld, Lp_intensity, Ld_intensity, La_intensity,
+                            Vx, Vy, Vz, Vw, Nvec)
+        err = np.abs(np.array(golden, dtype=np.float64) - ieee)
+        rel = err / np.maximum(np.abs(ieee), 1e-30)
+        for k, name in enumerate(["Px", "Py", "invPz", "Brightness"]):
+            print(f"[{fmt.label}] {name:10s} max abs err {err[:, k].max():.3e}  max rel err {rel[:, k].max():.3e}")
+
     # -------------------------
-    # Write input.hex 
+    # Input words (header + records)
     # -------------------------
     inp = []
-    inp.append(hex8(Nverts))
+    inp.append(Nverts)
 
     for r in range(4):
         for c in range(4):
-            inp.append(hex8(f32_to_u32(M[r, c])))
+            inp.append(f32_to_u32(M[r, c]))
 
     for k in range(3):
-        inp.append(hex8(f32_to_u32(Lp[k])))
+        inp.append(f32_to_u32(Lp[k]))
     for k in range(3):
-        inp.append(hex8(f32_to_u32(Ld[k])))
+        inp.append(f32_to_u32(Ld[k]))
 
-    inp.append(hex8(f32_to_u32(Lp_intensity)))
-    inp.append(hex8(f32_to_u32(Ld_intensity)))
-    inp.append(hex8(f32_to_u32(La_intensity)))
+    inp.append(f32_to_u32(Lp_intensity))
+    inp.append(f32_to_u32(Ld_intensity))
+    inp.append(f32_to_u32(La_intensity))
 
-    inp.append(hex8(f32_to_u32(Pscale_x)))
-    inp.append(hex8(f32_to_u32(Pscale_y)))
+    inp.append(f32_to_u32(Pscale_x))
+    inp.append(f32_to_u32(Pscale_y))
 
     for i in range(Nverts):
-        inp.append(hex8(int(ids[i])))
-        inp.append(hex8(f32_to_u32(Vx[i])))
-        inp.append(hex8(f32_to_u32(Vy[i])))
-        inp.append(hex8(f32_to_u32(Vz[i])))
-        inp.append(hex8(f32_to_u32(Vw[i])))
-        inp.append(hex8(f32_to_u32(Nvec[i, 0])))
-        inp.append(hex8(f32_to_u32(Nvec[i, 1])))
-        inp.append(hex8(f32_to_u32(Nvec[i, 2])))
-
-    (outdir / "input.hex").write_text("\n".join(inp) + "\n")
+        inp.append(int(ids[i]))
+        inp.append(f32_to_u32(Vx[i]))
+        inp.append(f32_to_u32(Vy[i]))
+        inp.append(f32_to_u32(Vz[i]))
+        inp.append(f32_to_u32(Vw[i]))
+        inp.append(f32_to_u32(Nvec[i, 0]))
+        inp.append(f32_to_u32(Nvec[i, 1]))
+        inp.append(f32_to_u32(Nvec[i, 2]))
 
     # -------------------------
-    # Write golden_output.hex 
+    # Golden output words
     # -------------------------
     out = []
-    out.append(hex8(Nverts))
+    out.append(Nverts)
     for (Px, Py, invPz, Br) in golden:
-        out.append(hex8(f32_to_u32(Px)))
-        out.append(hex8(f32_to_u32(Py)))
-        out.append(hex8(f32_to_u32(invPz)))
-        out.append(hex8(f32_to_u32(Br)))
+        out.append(f32_to_u32(Px))
+        out.append(f32_to_u32(Py))
+        out.append(f32_to_u32(invPz))
+        out.append(f32_to_u32(Br))
 
-    (outdir / "golden_output.hex").write_text("\n".join(out) + "\n")
-
-    print("[OK] wrote", outdir / "input.hex")
-    print("[OK] wrote", outdir / "golden_output.hex")
+    # -------------------------
+    # Write input.hex / golden_output.hex (or .vec)
+    # -------------------------
+    if args.format == "vec":
+        params = {"mode": args.mode, "n": Nverts}
+        if fmt is not None:
+            params["float_format"] = fmt.label
+        seed = args.seed if args.mode == "random" else None
+        in_path = outdir / "input.vec"
+        out_path = outdir / "golden_output.vec"
+        write_vec(in_path, inp, "vtx_in", record_words=8, prefix_words=len(inp) - 8 * Nverts, seed=seed,
+                  fields=["id", "Vx", "Vy", "Vz", "Vw", "Nx", "Ny", "Nz"], params=params)
+        write_vec(out_path, out, "vtx_out", record_words=4, prefix_words=1, seed=seed,
+                  fields=["Px", "Py", "invPz", "Brightness"], params=params)
+    else:
+        in_path = outdir / "input.hex"
+        out_path = outdir / "golden_output.hex"
+        in_path.write_text("\n".join(hex8(w) for w in inp) + "\n")
+        out_path.write_text("\n".join(hex8(w) for w in out) + "\n")
+
+    print("[OK] wrote", in_path)
+    print("[OK] wrote", out_path)
+    if cache is not None:
+        cache.store(key, outdir, names)
     print(f"mode={args.mode} N={Nverts}" + (f" seed={args.seed}" if args.mode == "random" else ""))
     print("intensities:",
           f"Lp_intensity={float(Lp_intensity):.6f}",
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+syn_report.py - parse Design Compiler reports and track performance per area / power
+
+Reads (default: ../syn next to this script)
+  area_rpt.txt        report_area        total / combinational / sequential area,
+                                         per-module area if the report was run with -hierarchy
+  timing_max_rpt.txt  report_timing      clock period, worst slack -> achievable clock
+  power_rpt.txt       report_power       dynamic (internal + switching) and leakage power
+
+and combines them with the pipeline throughput (vertices / cycle, as printed by top_tb.sv
+"[TB] throughput: ..." in STREAM mode) into
+  vertices/s            at the achievable clock (period - slack)
+  vertices/s per mm^2   (area in um^2, the unit of the N16ADFP library)
+  energy per vertex     total power / vertex rate at the clock the power was analysed at
+                        (the constrained period of the timing report)
+
+Results are kept in a JSON-lines history next to the reports (default: syn/history.jsonl,
+under version control), one entry per design and RTL revision. The revision is the last
+commit touching src/, and the entry date is that commit's date. Re-running on the same
+revision replaces its entry; the change against the previous revision is printed. When
+src/ has uncommitted changes the run is recorded in syn/history.scratch.jsonl instead
+(gitignored), so only committed RTL enters the shared history.
+
+Usage:
+  python3 syn_report.py
+  python3 syn_report.py --sim-log build/vcs.log --label "pipelined adder tree"
+  python3 syn_report.py --vertices-per-cycle 0.5 --no-history
+  python3 syn_report.py --show-history
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import re
+import subprocess
+from pathlib import Path
+
+DEFAULT_SYN_DIR = Path(__file__).resolve().parent.parent / "syn"
+REPORTS = {"area": "area_rpt.txt", "timing": "timing_max_rpt.txt", "power": "power_rpt.txt"}
+
+_NUM = r"([-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)"
+_POWER_SCALE_MW = {"W": 1e3, "mW": 1.0, "uW": 1e-3, "nW": 1e-6, "pW": 1e-9}
+
+
+def _header(text: str) -> dict:
+    out = {}
+    for key in ("Design", "Date"):
+        m = re.search(rf"^{key}\s*:\s*(.+?)\s*$", text, re.M)
+        out[key.lower()] = m.group(1) if m else None
+    return out
+
+
+def _field(text: str, label: str):
+    m = re.search(rf"^\s*{re.escape(label)}:?\s+{_NUM}", text, re.M)
+    return float(m.group(1)) if m else None
+
+
+# -----------------------------
+# Parsers
+# -----------------------------
+def parse_area(text: str) -> dict:
+    rec = _header(text)
+    rec.update(
+        combinational=_field(text, "Combinational area:"),
+        buf_inv=_field(text, "Buf/Inv area:"),
+        noncombinational=_field(text, "Noncombinational area:"),
+        macro=_field(text, "Macro/Black Box area:"),
+        total_cell_area=_field(text, "Total cell area:"),
+        cells=_field(text, "Number of cells:"),
+        sequential_cells=_field(text, "Number of sequential cells:"),
+    )
+    if rec["total_cell_area"] is None:
+        raise ValueError("area report: 'Total cell area' not found")
+
+    # report_area -hierarchy table: <instance> <absolute total> <percent> ... <design>
+    modules = {}
+    lines = text.splitlines()
+    for i, line in enumerate(lines):
+        if not line.startswith("Hierarchical cell"):
+            continue
+        j = i + 1
+        while j < len(lines) and not lines[j].startswith("---"):
+            j += 1
+        for row in lines[j + 1:]:
+            tok = row.split()
+            if not tok or tok[0] == "Total" or row.startswith("---"):
+                break
+            try:
+                area = float(tok[1])
+            except (IndexError, ValueError):
+                continue
+            design = tok[-1] if not re.fullmatch(_NUM, tok[-1]) else tok[0]
+            modules[tok[0]] = {"area": area, "design": design}
+        break
+    rec["modules"] = modules
+
+    # area per module type (direct children only; absolute totals include sub-hierarchy)
+    by_type = {}
+    for inst, m in modules.items():
+        if "/" in inst or m["design"] == rec["design"]:
+            continue
+        base = re.sub(r"_\d+$", "", m["design"])
+        t = by_type.setdefault(base, {"instances": 0, "area": 0.0})
+        t["instances"] += 1
+        t["area"] += m["area"]
+    rec["module_types"] = by_type
+    return rec
+
+
+def parse_timing(text: str) -> dict:
+    rec = _header(text)
+    paths = []
+    # one block per reported path, each ends with its slack line
+    for block in re.split(r"^\s*Startpoint:", text, flags=re.M)[1:]:
+        start = block.split("\n", 1)[0].strip()
+        end = re.search(r"^\s*Endpoint:\s*(.+?)\s*$", block, re.M)
+        group = re.search(r"^\s*Path Group:\s*(\S+)", block, re.M)
+        slack = re.search(rf"^\s*slack \((\w+)[^)]*\)\s+{_NUM}", block, re.M)
+        # "clock clk (rise edge)  <period>  <period>" on the capture side
+        edges = re.findall(rf"^\s*clock (\S+) \((?:rise|fall) edge\)\s+{_NUM}", block, re.M)
+        if not slack:
+            continue
+        paths.append({
+            "startpoint": start,
+            "endpoint": end.group(1) if end else None,
+            "group": group.group(1) if group else None,
+            "clock": edges[-1][0] if edges else None,
+            "period": float(edges[-1][1]) if edges else None,
+            "status": slack.group(1),
+            "slack": float(slack.group(2)),
+        })
+    if not paths:
+        raise ValueError("timing report: no path with a slack line found")
+
+    worst = min(paths, key=lambda p: p["slack"])
+    rec.update(paths=len(paths), worst=worst, period_ns=worst["period"], worst_slack_ns=worst["slack"])
+    if worst["period"]:
+        achievable = worst["period"] - worst["slack"]
+        rec.update(achievable_period_ns=achievable, fmax_mhz=1e3 / achievable)
+    return rec
+
+
+def parse_power(text: str) -> dict:
+    rec = _header(text)
+
+    def power_mw(label):
+        m = re.search(rf"^\s*{label}\s*=\s*{_NUM}\s*(\w+)", text, re.M)
+        if not m:
+            return None
+        return float(m.group(1)) * _POWER_SCALE_MW.get(m.group(2), 1.0)
+
+    m = re.search(rf"Global Operating Voltage\s*=\s*{_NUM}", text)
+    rec.update(
+        voltage=float(m.group(1)) if m else None,
+        internal_mw=power_mw("Cell Internal Power"),
+        switching_mw=power_mw("Net Switching Power"),
+        dynamic_mw=power_mw("Total Dynamic Power"),
+        leakage_mw=power_mw("Cell Leakage Power"),
+    )
+    if rec["dynamic_mw"] is None:
+        raise ValueError("power report: 'Total Dynamic Power' not found")
+    rec["total_mw"] = rec["dynamic_mw"] + (rec["leakage_mw"] or 0.0)
+
+    # power groups: internal / switching (mW), leakage (nW), total (mW)
+    groups = {}
+    for name in ("register", "sequential", "combinational", "clock_network", "memory"):
+        g = re.search(rf"^{name}\s+{_NUM}\s+{_NUM}\s+{_NUM}\s+{_NUM}", text, re.M)
+        if g:
+            groups[name] = {"total_mw": float(g.group(4)), "leakage_nw": float(g.group(3))}
+    rec["groups"] = groups
+    return rec
+
+
+def parse_vertices_per_cycle(log_path) -> float:
+    text = Path(log_path).read_text(errors="replace")
+    m = re.findall(r"\(\s*" + _NUM + r"\s+vertices/cycle\)", text)
+    if not m:
+        raise ValueError(f"{log_path}: no '[TB] throughput: ... vertices/cycle' line")
+    return float(m[-1])
+
+
+# -----------------------------
+# Metrics / history
+# -----------------------------
+def metrics(area, timing, power, vertices_per_cycle) -> dict:
+    area_mm2 = area["total_cell_area"] * 1e-6       # um^2 -> mm^2
+    out = {"vertices_per_cycle": vertices_per_cycle, "area_mm2": area_mm2}
+    if timing.get("fmax_mhz"):
+        vps = vertices_per_cycle * timing["fmax_mhz"] * 1e6
+        out.update(vertices_per_s=vps, vertices_per_s_per_mm2=vps / area_mm2)
+    if timing.get("period_ns"):
+        # power is analysed at the constrained clock
+        vps_power = vertices_per_cycle * 1e9 / timing["period_ns"]
+        out["energy_per_vertex_pj"] = power["total_mw"] * 1e-3 / vps_power * 1e12
+        out["dynamic_energy_per_vertex_pj"] = power["dynamic_mw"] * 1e-3 / vps_power * 1e12
+    return out
+
+
+def _rtl_revision():
+    """(revision, commit date, dirty) of the synthesized design: last commit touching src/, not HEAD"""
+    try:
+        root = Path(__file__).resolve().parent.parent
+        rev, date = (subprocess.run(["git", "log", "-1", "--format=%h %cI", "--", "src"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.split() or [None, None])
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "src"], cwd=root,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return rev, date, bool(dirty)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None, True
+
+
+def save_history(path, history):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(json.dumps(rec, sort_keys=True) + "\n" for rec in history))
+
+
+def load_history(path):
+    path = Path(path)
+    if not path.is_file():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+KEY_METRICS = [
+    ("area_mm2", "area mm^2", "{:.6f}"),
+    ("fmax_mhz", "fmax MHz", "{:.1f}"),
+    ("total_mw", "power mW", "{:.3f}"),
+    ("vertices_per_s", "vertices/s", "{:.4g}"),
+    ("vertices_per_s_per_mm2", "vertices/s/mm^2", "{:.4g}"),
+    ("energy_per_vertex_pj", "pJ/vertex", "{:.3f}"),
+]
+
+
+def _flat(rec):
+    return {"area_mm2": rec["metrics"]["area_mm2"], "fmax_mhz": rec["timing"].get("fmax_mhz"),
+            "total_mw": rec["power"]["total_mw"], **rec["metrics"]}
+
+
+def print_record(rec, prev=None):
+    a, t, p = rec["area"], rec["timing"], rec["power"]
+    print(f"== {a['design']}  (reports {a['date']})")
+    print(f"   area: total {a['total_cell_area']:.1f} um^2  comb {a['combinational']:.1f}  "
+          f"noncomb {a['noncombinational']:.1f}  cells {a['cells']:.0f}")
+    for name, m in sorted(a["module_types"].items(), key=lambda kv: -kv[1]["area"]):
+        print(f"         {name:24s} x{m['instances']:<3d} {m['area']:12.1f} um^2")
+    if not a["module_types"]:
+        print("         (no per-module breakdown: run report_area -hierarchy)")
+    w = t["worst"]
+    print(f"   timing: period {t['period_ns']} ns, worst slack {t['worst_slack_ns']:+.4f} ns ({w['status']}) "
+          f"{w['startpoint']} -> {w['endpoint']}")
+    if t.get("fmax_mhz"):
+        print(f"           achievable period {t['achievable_period_ns']:.4f} ns = {t['fmax_mhz']:.1f} MHz")
+    print(f"   power: dynamic {p['dynamic_mw']:.4f} mW (internal {p['internal_mw']:.4f}, switching "
+          f"{p['switching_mw']:.4f}), leakage {p['leakage_mw'] * 1e3:.3f} uW @ {p['voltage']} V")
+
+    cur = _flat(rec)
+    old = _flat(prev) if prev else {}
+    print(f"   perf ({rec['metrics']['vertices_per_cycle']:g} vertices/cycle):"
+          + ("" if prev else "  (first history entry)"))
+    for key, label, fmt in KEY_METRICS:
+        v = cur.get(key)
+        if v is None:
+            continue
+        line = f"      {label:16s} {fmt.format(v):>14s}"
+        if old.get(key):
+            line += f"   {100.0 * (v - old[key]) / old[key]:+7.2f}% vs {prev.get('git') or '?'}"
+        print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="parse DC area / timing / power reports and track perf per area / power")
+    ap.add_argument("--syn-dir", type=str, default=str(DEFAULT_SYN_DIR), help="directory with the reports")
+    ap.add_argument("--vertices-per-cycle", type=float, default=None,
+                    help="pipeline throughput (default 1.0, or read from --sim-log)")
+    ap.add_argument("--sim-log", type=str, default=None,
+                    help="simulation log with the top_tb.sv '[TB] throughput' line")
+    ap.add_argument("--history", type=str, default=None,
+                    help="history file (default: <syn-dir>/history.jsonl; scratch runs go to history.scratch.jsonl)")
+    ap.add_argument("--no-history", action="store_true", help="do not append to the history file")
+    ap.add_argument("--label", type=str, default=None, help="note stored with the history entry")
+    ap.add_argument("--show-history", action="store_true", help="print the history table and exit")
+    ap.add_argument("--json", action="store_true", help="print the parsed record as JSON")
+    args = ap.parse_args()
+
+    syn_dir = Path(args.syn_dir)
+    history_path = Path(args.history) if args.history else syn_dir / "history.jsonl"
+    history = load_history(history_path)
+
+    if args.show_history:
+        print(f"{'date':20s} {'git':14s} {'design':18s} " + " ".join(f"{label:>16s}" for _, label, _ in KEY_METRICS))
+        for rec in history:
+            cur = _flat(rec)
+            print(f"{rec['timestamp'][:19]:20s} {rec.get('git') or '-':14s} {rec['area']['design']:18s} "
+                  + " ".join(f"{fmt.format(cur[k]) if cur.get(k) is not None else '-':>16s}"
+                             for k, _, fmt in KEY_METRICS))
+        return
+
+    texts = {k: (syn_dir / name).read_text(errors="replace") for k, name in REPORTS.items()}
+    area, timing, power = parse_area(texts["area"]), parse_timing(texts["timing"]), parse_power(texts["power"])
+
+    if args.vertices_per_cycle is not None:
+        vpc = args.vertices_per_cycle
+    elif args.sim_log:
+        vpc = parse_vertices_per_cycle(args.sim_log)
+    else:
+        vpc = 1.0   # mv_mul_4x4_fp32 accepts one vertex per cycle
+
+    digest = hashlib.sha256("".join(texts[k] for k in REPORTS).encode() + repr(vpc).encode()).hexdigest()
+    rev, rev_date, dirty = _rtl_revision()
+    scratch = dirty or rev is None
+    rec = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds") if scratch else rev_date,
+        "git": (rev or "unknown") + ("-dirty" if scratch else ""),
+        "label": args.label,
+        "reports_sha256": digest,
+        "area": area,
+        "timing": timing,
+        "power": power,
+        "metrics": metrics(area, timing, power, vpc),
+    }
+
+    # previous revision of the same design (committed history only)
+    same_design = [h for h in history if h["area"]["design"] == area["design"] and h.get("git") != rec["git"]]
+    prev = same_design[-1] if same_design else None
+    print_record(rec, prev)
+
+    if args.no_history:
+        pass
+    elif scratch:
+        scratch_path = history_path.with_name(history_path.stem + ".scratch.jsonl")
+        scratch_hist = load_history(scratch_path)
+        if scratch_hist and scratch_hist[-1].get("reports_sha256") == digest:
+            print(f"[HIST] reports unchanged since {scratch_hist[-1]['timestamp']}, not appended")
+        else:
+            save_history(scratch_path, scratch_hist + [rec])
+            print(f"[HIST] src/ has uncommitted changes: recorded in {scratch_path} (not the shared history)")
+    else:
+        key = (area["design"], rec["git"])
+        old = [i for i, h in enumerate(history) if (h["area"]["design"], h.get("git")) == key]
+        if old and history[old[0]].get("reports_sha256") == digest:
+            print(f"[HIST] {rec['git']} already recorded with the same reports, not changed")
+        elif old:
+            history[old[0]] = rec
+            save_history(history_path, history)
+            print(f"[HIST] replaced the {rec['git']} entry in {history_path}")
+        else:
+            save_history(history_path, history + [rec])
+            print(f"[HIST] appended {rec['git']} to {history_path}")
+
+    if args.json:
+        print(json.dumps(rec, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -29,8 +29,24 @@ end
   localparam int OUT_WORDS  = 4;   // 4out
   localparam int LATENCY    = 4;
 
+`ifdef STREAM
+  // Streaming layout (gen_mv_hex.py --mode stream):
+  //   in : n_matrices, verts_per_matrix, then per matrix m00..m33 + verts_per_matrix*(vx,vy,vz,vw)
+  //   out: ox,oy,oz,ow per vertex
+  // The matrix is latched once via m_valid (together with the first vertex of its group),
+  // the rest of the group streams through in_valid only.
+  localparam int MAX_IN_WORDS  = 1 << 20;
+  localparam int MAX_OUT_WORDS = 1 << 20;
+
+  localparam string IN_HEX  = "../sim/out_hex/mv_stream_in.hex";
+  localparam string OUT_HEX = "../sim/out_hex/mv_stream_out.hex";
+`else
+  localparam int MAX_IN_WORDS  = N_CASES*IN_WORDS;
+  localparam int MAX_OUT_WORDS = N_CASES*OUT_WORDS;
+
   localparam string IN_HEX  = "../sim/out_hex/mv_in.hex";
   localparam string OUT_HEX = "../sim/out_hex/mv_out.hex";
+`endif
 
   // -------------------------
   // Clock / Reset
@@ -74,8 +90,8 @@ end
   // -------------------------
   // Hex memories
   // -------------------------
-  logic [31:0] in_mem  [0:N_CASES*IN_WORDS-1];
-  logic [31:0] out_mem [0:N_CASES*OUT_WORDS-1];
+  logic [31:0] in_mem  [0:MAX_IN_WORDS-1];
+  logic [31:0] out_mem [0:MAX_OUT_WORDS-1];
 
   // -------------------------
   // Scoreboard queue (golden)
@@ -110,6 +126,28 @@ end
     end
   endtask
 
+  task automatic load_matrix(int base);
+    begin
+      m00 = in_mem[base+0];  m01 = in_mem[base+1];
+      m02 = in_mem[base+2];  m03 = in_mem[base+3];
+      m10 = in_mem[base+4];  m11 = in_mem[base+5];
+      m12 = in_mem[base+6];  m13 = in_mem[base+7];
+      m20 = in_mem[base+8];  m21 = in_mem[base+9];
+      m22 = in_mem[base+10]; m23 = in_mem[base+11];
+      m30 = in_mem[base+12]; m31 = in_mem[base+13];
+      m32 = in_mem[base+14]; m33 = in_mem[base+15];
+    end
+  endtask
+
+  task automatic load_vertex(int base);
+    begin
+      vx  = in_mem[base+0];
+      vy  = in_mem[base+1];
+      vz  = in_mem[base+2];
+      vw  = in_mem[base+3];
+    end
+  endtask
+
   task automatic push_case_golden(int case_idx);
     int base;
     gold_t g;
@@ -126,6 +164,33 @@ end
   int err_count;
   int i;
 
+  // -------------------------
+  // Throughput measurement
+  // -------------------------
+  longint cycle;
+  longint first_in_cycle, last_out_cycle;
+  int     n_in, n_out;
+
+  always_ff @(posedge clk) begin
+    if (rst) begin
+      cycle          <= 0;
+      first_in_cycle <= -1;
+      last_out_cycle <= -1;
+      n_in           <= 0;
+      n_out          <= 0;
+    end else begin
+      cycle <= cycle + 1;
+      if (in_valid) begin
+        if (first_in_cycle < 0) first_in_cycle <= cycle;
+        n_in <= n_in + 1;
+      end
+      if (out_valid) begin
+        last_out_cycle <= cycle;
+        n_out <= n_out + 1;
+      end
+    end
+  end
+
   // -------------------------
   // Stimulus
   // -------------------------
@@ -144,6 +209,38 @@ end
     rst = 1'b0;
     @(posedge clk);
 
+`ifdef STREAM
+    begin
+      int n_mat, vpm, ptr, vtx;
+      n_mat = in_mem[0];
+      vpm   = in_mem[1];
+      ptr   = 2;
+      vtx   = 0;
+      if (n_mat * vpm * OUT_WORDS > MAX_OUT_WORDS ||
+          2 + n_mat * (16 + vpm * 4) > MAX_IN_WORDS)
+        $fatal(1, "[TB] stream too large: %0d matrices x %0d vertices", n_mat, vpm);
+      $display("[TB] STREAM mode: %0d matrices x %0d vertices", n_mat, vpm);
+
+      for (int grp = 0; grp < n_mat; grp++) begin
+        for (int k = 0; k < vpm; k++) begin
+          #0.1;
+          in_valid = 1'b1;
+          // latch the new matrix together with the first vertex of the group
+          m_valid  = (k == 0);
+          if (k == 0) begin
+            load_matrix(ptr);
+            ptr += 16;
+          end
+          load_vertex(ptr);
+          ptr += 4;
+          push_case_golden(vtx);
+          vtx++;
+          @(posedge clk);
+        end
+      end
+      #0.1 m_valid = 1'b0;
+    end
+`else
     for (i = 0; i < N_CASES; i++) begin
       #0.1;
       in_valid = 1'b1;
@@ -152,6 +249,7 @@ end
       push_case_golden(i);
       @(posedge clk);
     end
+`endif
 
     #0.1 in_valid = 1'b0;
 
@@ -164,6 +262,12 @@ end
     else
       $display("[TB] FAIL err_count=%0d", err_count);
 
+    if (n_out > 0)
+      $display("[TB] throughput: %0d vertices in %0d cycles (%.3f vertices/cycle), pipeline latency %0d cycles",
+               n_out, last_out_cycle - first_in_cycle + 1,
+               real'(n_out) / real'(last_out_cycle - first_in_cycle + 1),
+               last_out_cycle - first_in_cycle + 1 - n_in);
+
     $finish;
   end
 
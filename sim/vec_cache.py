@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+vec_cache.py - content-addressed cache for generated test vectors / golden outputs
+
+Key = sha256 over
+  - the generator parameters (mode, N, seed, format, ...)
+  - the source code of the golden model / stimulus functions
+so a cache entry is reused only when the same generator code would produce the same files.
+
+Entries live in <cache_dir>/<key>/ (default: sim/.vec_cache, or $SIM_VEC_CACHE).
+Each hit refreshes the entry mtime; when the cache grows past max_bytes the least
+recently used entries are evicted.
+
+Usage from a generator:
+  cache = VecCache(args.cache_dir, args.cache_max_mb)
+  key = cache.key(params, [fp32_mul_trunc_hw, fp32_addsub_trunc_hw, ...])
+  if not args.force and cache.fetch(key, outdir, names):
+      return
+  ... generate ...
+  cache.store(key, outdir, names)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".vec_cache"
+DEFAULT_MAX_MB = 1024
+
+
+def source_digest(objs) -> str:
+    """sha256 over the source of functions / modules (or raw strings)"""
+    h = hashlib.sha256()
+    for obj in objs:
+        src = obj if isinstance(obj, str) else inspect.getsource(obj)
+        h.update(src.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class VecCache:
+    def __init__(self, root=None, max_mb=DEFAULT_MAX_MB):
+        if root is None:
+            root = os.environ.get("SIM_VEC_CACHE", DEFAULT_CACHE_DIR)
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+
+    def key(self, params: dict, sources) -> str:
+        blob = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256((blob + "\0" + source_digest(sources)).encode("utf-8")).hexdigest()
+
+    def fetch(self, key: str, outdir, names) -> bool:
+        """Copy a cached entry into outdir. Returns False on a miss."""
+        entry = self.root / key
+        if not all((entry / n).is_file() for n in names):
+            return False
+        outdir = Path(outdir)
+        outdir.mkdir(parents=True, exist_ok=True)
+        for n in names:
+            shutil.copyfile(entry / n, outdir / n)
+        os.utime(entry)  # LRU: most recently used
+        print(f"[CACHE] hit {key[:16]} ({self.root})")
+        for n in names:
+            print("[OK] reused", outdir / n)
+        return True
+
+    def store(self, key: str, outdir, names):
+        """Add outdir/names as an entry (atomic rename), then evict down to max_bytes."""
+        outdir = Path(outdir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        entry = self.root / key
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp_", dir=self.root))
+        try:
+            for n in names:
+                shutil.copyfile(outdir / n, tmp / n)
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        print(f"[CACHE] stored {key[:16]} ({self.root})")
+        self.evict(keep=key)
+
+    def entries(self):
+        """[(mtime, size, path)] oldest first"""
+        out = []
+        if not self.root.is_dir():
+            return out
+        for d in self.root.iterdir():
+            if not d.is_dir() or d.name.startswith(".tmp_"):
+                continue
+            size = sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+            out.append((d.stat().st_mtime, size, d))
+        out.sort()
+        return out
+
+    def evict(self, keep=None):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, d in entries:
+            if total <= self.max_bytes:
+                break
+            if d.name == keep:
+                continue
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
+            print(f"[CACHE] evicted {d.name[:16]} ({size} bytes)")
+
+
+def add_cache_args(ap):
+    ap.add_argument("--force", action="store_true", help="regenerate even if the cache has a matching entry")
+    ap.add_argument("--no-cache", action="store_true", help="do not read or write the vector cache")
+    ap.add_argument("--cache-dir", type=str, default=None,
+                    help=f"cache directory (default: $SIM_VEC_CACHE or {DEFAULT_CACHE_DIR.name}/ next to this script)")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                    help="evict least recently used entries above this size")
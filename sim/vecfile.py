@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+vecfile.py - compact binary container for sim test vectors
+
+The .hex files ($readmemh) store one ASCII word per line (9 bytes per 4-byte word).
+A .vec file stores the same 32-bit words as raw little-endian uint32 after a small header,
+so it can be read back zero-copy with np.memmap and converted to .hex when the
+testbench needs it.
+
+File layout (all little-endian):
+  magic          : 4 bytes  b"MVEC"
+  version        : uint16   (FORMAT_VERSION)
+  flags          : uint16   (reserved, 0)
+  n_records      : uint32   number of records
+  prefix_words   : uint32   words before the first record (file header words, e.g. N / globals)
+  record_words   : uint32   words per record
+  seed           : int64    generator seed (-1 if not applicable)
+  meta_len       : uint32   length of the JSON metadata that follows
+  meta           : meta_len bytes of UTF-8 JSON {"layout", "fields", "params"}
+  padding        : zero bytes up to an 8-byte boundary
+  payload        : (prefix_words + n_records * record_words) * uint32
+
+Usage:
+  python3 vecfile.py info   out_hex/mv_in.vec
+  python3 vecfile.py tohex  out_hex/mv_in.vec out_hex/mv_in.hex
+"""
+
+import argparse
+import json
+import struct
+from pathlib import Path
+import numpy as np
+
+MAGIC = b"MVEC"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIIqI")
+_ALIGN = 8
+
+
+def _payload_offset(meta_len: int) -> int:
+    end = _HEADER.size + meta_len
+    return (end + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class VecWriter:
+    """
+    Streaming writer: header is written up front, n_records is patched on close().
+
+      with VecWriter(path, "mv_out", record_words=4, seed=seed) as w:
+          w.write(words)           # any iterable / array of uint32 words, may be called repeatedly
+    """
+
+    def __init__(self, path, layout: str, record_words: int, prefix_words: int = 0,
+                 seed=None, fields=None, params=None):
+        self.path = Path(path)
+        self.prefix_words = int(prefix_words)
+        self.record_words = int(record_words)
+        if self.record_words <= 0:
+            raise ValueError("record_words must be > 0")
+        self.seed = -1 if seed is None else int(seed)
+        meta = {"layout": layout, "fields": list(fields or []), "params": dict(params or {})}
+        self._meta = json.dumps(meta, sort_keys=True).encode("utf-8")
+        self._n_words = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._f = self.path.open("wb")
+        self._write_header(0)
+        self._f.write(self._meta)
+        self._f.write(b"\0" * (_payload_offset(len(self._meta)) - _HEADER.size - len(self._meta)))
+
+    def _write_header(self, n_records: int):
+        self._f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, n_records, self.prefix_words,
+                                   self.record_words, self.seed, len(self._meta)))
+
+    def write(self, words):
+        arr = np.asarray(words, dtype=np.int64)
+        if arr.size and (arr.min() < -(1 << 31) or arr.max() > 0xFFFFFFFF):
+            raise ValueError("word out of 32-bit range")
+        arr = (arr & 0xFFFFFFFF).astype("<u4")
+        arr.tofile(self._f)
+        self._n_words += arr.size
+
+    def close(self):
+        if self._f is None:
+            return
+        body = self._n_words - self.prefix_words
+        if body < 0 or body % self.record_words:
+            self._f.close()
+            self._f = None
+            raise ValueError(f"{self.path}: {self._n_words} words do not match "
+                             f"prefix_words={self.prefix_words} + n * record_words={self.record_words}")
+        self._f.seek(0)
+        self._write_header(body // self.record_words)
+        self._f.close()
+        self._f = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_vec(path, words, layout: str, record_words: int, prefix_words: int = 0,
+              seed=None, fields=None, params=None):
+    with VecWriter(path, layout, record_words, prefix_words, seed, fields, params) as w:
+        w.write(words)
+
+
+class VecFile:
+    """
+    Zero-copy reader. `words` is a read-only np.memmap of the uint32 payload;
+    `prefix` / `records` / `as_f32()` are views into it (no parsing, no copies).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            raw = f.read(_HEADER.size)
+            if len(raw) < _HEADER.size:
+                raise ValueError(f"{self.path}: truncated header")
+            (magic, version, _flags, n_records, prefix_words, record_words,
+             seed, meta_len) = _HEADER.unpack(raw)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path}: not a vec file (magic={magic!r})")
+            if version != FORMAT_VERSION:
+                raise ValueError(f"{self.path}: unsupported vec format version {version}")
+            meta = json.loads(f.read(meta_len).decode("utf-8"))
+
+        self.version = version
+        self.n_records = n_records
+        self.prefix_words = prefix_words
+        self.record_words = record_words
+        self.seed = None if seed == -1 else seed
+        self.layout = meta["layout"]
+        self.fields = meta["fields"]
+        self.params = meta["params"]
+
+        n_words = prefix_words + n_records * record_words
+        offset = _payload_offset(meta_len)
+        if self.path.stat().st_size < offset + 4 * n_words:
+            raise ValueError(f"{self.path}: truncated payload")
+        if n_words:
+            self.words = np.memmap(self.path, dtype="<u4", mode="r", offset=offset, shape=(n_words,))
+        else:
+            self.words = np.zeros(0, dtype="<u4")
+
+    @property
+    def n_words(self) -> int:
+        return len(self.words)
+
+    @property
+    def prefix(self) -> np.ndarray:
+        return self.words[:self.prefix_words]
+
+    @property
+    def records(self) -> np.ndarray:
+        return self.words[self.prefix_words:].reshape(self.n_records, self.record_words)
+
+    def as_f32(self) -> np.ndarray:
+        return self.words.view("<f4")
+
+    def info(self) -> dict:
+        return {
+            "path": str(self.path), "version": self.version, "layout": self.layout,
+            "n_records": self.n_records, "prefix_words": self.prefix_words,
+            "record_words": self.record_words, "seed": self.seed,
+            "fields": self.fields, "params": self.params,
+        }
+
+
+def read_vec(path) -> VecFile:
+    return VecFile(path)
+
+
+def vec_to_hex(vec_path, hex_path, chunk_words: int = 1 << 16) -> int:
+    """
+    Stream a .vec payload out as a $readmemh .hex file (one 8-digit word per line).
+    Memory use is bounded by chunk_words. Returns the number of words written.
+    """
+    vec = VecFile(vec_path)
+    hex_path = Path(hex_path)
+    hex_path.parent.mkdir(parents=True, exist_ok=True)
+    with hex_path.open("w") as f:
+        for start in range(0, vec.n_words, chunk_words):
+            chunk = np.asarray(vec.words[start:start + chunk_words])
+            f.write("".join(f"{int(w):08x}\n" for w in chunk))
+    return vec.n_words
+
+
+def main():
+    ap = argparse.ArgumentParser(description="binary test-vector container tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p_info = sub.add_parser("info", help="print the header of a .vec file")
+    p_info.add_argument("vec")
+
+    p_hex = sub.add_parser("tohex", help="convert a .vec file to the $readmemh .hex layout")
+    p_hex.add_argument("vec")
+    p_hex.add_argument("hex")
+
+    args = ap.parse_args()
+
+    if args.cmd == "info":
+        for k, v in VecFile(args.vec).info().items():
+            print(f"{k:13s}: {v}")
+    else:
+        n = vec_to_hex(args.vec, args.hex)
+        print(f"[OK] wrote {args.hex} ({n} words)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import os
 import sys
+import argparse
 from tqdm import tqdm
+from lighting import Lights, PointLight, DirectionalLight, normalize_rows
+from obj_stream import StreamingModel
+from floatfmt import parse_format, vertex_processing_emulated
 
 # ==========================================
 # 1. 基礎數學與矩陣函式
@@ -46,11 +50,14 @@ def normalize(v):
 # ==========================================
 
 class Rasterizer:
-    def __init__(self, width, height):
+    def __init__(self, width, height, depth_test=False):
         self.width = int(width)
         self.height = int(height)
         # 建立畫布: Height x Width x 3 (RGB), 數值範圍 0.0 ~ 1.0
         self.canvas = np.zeros((self.height, self.width, 3))
+        # Depth buffer: 存 1/z (越大越近), 0 代表無限遠
+        # 參考: https://gabrielgambetta.com/computer-graphics-from-scratch/12-hidden-surface-removal.html
+        self.depth = np.zeros((self.height, self.width)) if depth_test else None
 
     def put_pixel(self, x, y, color):
         # 為了安全起見檢查邊界 (雖然演算法應確保在範圍內)
@@ -94,18 +101,66 @@ class Rasterizer:
             for i, y in enumerate(range(y0, y1 + 1)):
                 self.put_pixel(xs[i], y, color)
 
+    def draw_lines(self, p0, p1, color, depth_bias=None):
+        """
+        一次畫多條線 (draw_line 的向量化版本, 不逐點呼叫 put_pixel; 畫出的像素與 draw_line 相同)
+        p0, p1: (E, 2) 端點 (x, y); 若要做深度測試則為 (E, 3) 的 (x, y, 1/z)
+        depth_bias: 不為 None 且有 depth buffer 時做 hidden-line 測試,
+                    1/z * (1 + depth_bias) >= depth buffer 才畫 (容許線與所在表面同深度)
+        線不寫入 depth buffer
+        """
+        p0 = np.asarray(p0, dtype=float)
+        p1 = np.asarray(p1, dtype=float)
+        if len(p0) == 0: return
+
+        # 與 draw_line 相同: 端點取整, 沿主軸 (較長軸) 由小到大取樣, 副軸以 linspace 的算法插值
+        x0, y0 = np.round(p0[:, 0]), np.round(p0[:, 1])
+        x1, y1 = np.round(p1[:, 0]), np.round(p1[:, 1])
+        horiz = np.abs(x1 - x0) > np.abs(y1 - y0)
+        i0, i1 = np.where(horiz, x0, y0), np.where(horiz, x1, y1)
+        d0, d1 = np.where(horiz, y0, x0), np.where(horiz, y1, x1)
+        swap = i0 > i1
+        i0, i1 = np.where(swap, i1, i0), np.where(swap, i0, i1)
+        d0, d1 = np.where(swap, d1, d0), np.where(swap, d0, d1)
+        n = (i1 - i0).astype(np.int64) + 1
+
+        # 展開成所有取樣點: edge id 與主軸上的第幾步
+        edge = np.repeat(np.arange(len(n)), n)
+        step = np.arange(len(edge)) - np.repeat(np.cumsum(n) - n, n)
+        div = np.maximum(n - 1, 1)
+        # np.linspace: start + k * ((stop - start) / (num - 1)), 最後一點直接用 stop
+        minor = d0[edge] + step * ((d1 - d0) / div)[edge]
+        last = step == n[edge] - 1
+        minor[last] = d1[edge[last]]
+        major = (i0[edge] + step).astype(np.int64)
+        minor = np.round(minor).astype(np.int64)
+        xs = np.where(horiz[edge], major, minor)
+        ys = np.where(horiz[edge], minor, major)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+
+        if depth_bias is not None and self.depth is not None and p0.shape[1] > 2:
+            z0, z1 = np.where(swap, p1[:, 2], p0[:, 2]), np.where(swap, p0[:, 2], p1[:, 2])
+            t = step / div[edge]
+            zs = z0[edge] + t * (z1 - z0)[edge]
+            inside[inside] = zs[inside] * (1.0 + depth_bias) >= self.depth[ys[inside], xs[inside]]
+
+        self.canvas[ys[inside], xs[inside]] = color
+
     def draw_shaded_triangle(self, p0, p1, p2, color):
         """
         畫填滿且有陰影的三角形 (Gouraud Shading 概念)
         p0, p1, p2: (x, y, h) tuple，其中 h 為亮度強度 (0~1)
+                    若開啟 depth_test, 可傳入 (x, y, h, 1/z) 做深度測試
         參考: https://gabrielgambetta.com/computer-graphics-from-scratch/08-shaded-triangles.html
         """
+        use_depth = self.depth is not None and len(p0) > 3
+
         # 1. 依照 Y 座標排序頂點: P0 (底), P1 (中), P2 (頂)
         # 注意：这里的 Y 是螢幕座標，通常 Y=0 在上方，但我們的 Canvas 處理時會對應好
         pts = sorted([p0, p1, p2], key=lambda p: p[1])
-        x0, y0, h0 = pts[0]
-        x1, y1, h1 = pts[1]
-        x2, y2, h2 = pts[2]
+        x0, y0, h0 = pts[0][:3]
+        x1, y1, h1 = pts[1][:3]
+        x2, y2, h2 = pts[2][:3]
 
         y0, y1, y2 = int(round(y0)), int(round(y1)), int(round(y2))
         
@@ -135,14 +190,23 @@ class Rasterizer:
         x012 = x012[:m]
         h012 = h012[:m]
 
+        # 1/z 在螢幕空間是線性的, 可以跟 H 一樣插值
+        if use_depth:
+            z0, z1, z2 = pts[0][3], pts[1][3], pts[2][3]
+            z02 = self.interpolate(y0, z0, y2, z2)
+            z012 = np.concatenate([self.interpolate(y0, z0, y1, z1)[:-1],
+                                   self.interpolate(y1, z1, y2, z2)])[:m]
+
         # 4. 判斷哪一邊是左邊，哪一邊是右邊
         mid = len(x02) // 2
         if x02[mid] < x012[mid]:
             x_left, h_left = x02, h02
             x_right, h_right = x012, h012
+            if use_depth: z_left, z_right = z02, z012
         else:
             x_left, h_left = x012, h012
             x_right, h_right = x02, h02
+            if use_depth: z_left, z_right = z012, z02
 
         # 5. 逐行掃描 (Scanline)
         for i in range(len(x_left)):
@@ -176,7 +240,16 @@ class Rasterizer:
                     # 利用 numpy 廣播機制一次填滿整條線
                     pixel_colors = color * current_h[:, np.newaxis]
                     
-                    self.canvas[y, start_x:end_x] = pixel_colors
+                    if use_depth:
+                        # 深度測試: 只畫比 depth buffer 更近 (1/z 更大) 的像素
+                        z_segment = self.interpolate(xl, z_left[i], xr, z_right[i])
+                        current_z = z_segment[seg_idx_start:seg_idx_end]
+                        depth_row = self.depth[y, start_x:end_x]
+                        closer = current_z > depth_row
+                        depth_row[closer] = current_z[closer]
+                        self.canvas[y, start_x:end_x][closer] = pixel_colors[closer]
+                    else:
+                        self.canvas[y, start_x:end_x] = pixel_colors
 
 # ==========================================
 # 3. Vertex Pipeline (來自 HackMD)
@@ -186,43 +259,34 @@ Input:  V[x, y, z]
         N[nx, ny, nz]
         M_MV: 4*4 Model View matrix
         P_scale_x/y: projection scale
+        frame_lights: Lights.prepare() 的結果
 Output: Px, Py, inv_Pz, Brightness
 """
 
-def vertex_processing_pipeline(V, N, M_MV, P_scale_x, P_scale_y):
+def vertex_processing_batch(V, N, M_MV, P_scale_x, P_scale_y, frame_lights):
+    """
+    一次處理 K 個頂點
+    V: (K, 4), N: (K, 3)
+    frame_lights: Lights.prepare() 的結果 (每個 frame 只算一次)
+    Output: Px, Py, inv_Pz, Brightness, V'z  (皆為 (K,))
+    """
     # 1. 頂點座標變換 V' = M_MV * V
-    V_prime = M_MV @ V
-    V_prime_xyz = V_prime[0:3]
-
-    # 2. 光照向量計算
-    L_p_prime = L_p - V_prime_xyz
-
-    # 3. 向量正規化
-    N_transformed = M_MV[:3, :3] @ N 
-    N_hat = normalize(N_transformed)
-    L_p_prime_hat = normalize(L_p_prime)
-    L_d_hat = normalize(L_d)
-
-    # 4. 漫反射強度計算
-    I_diffuse_p = max(0.0, np.dot(N_hat, L_p_prime_hat))
-    I_diffuse_d = max(0.0, np.dot(N_hat, L_d_hat))
+    V_prime = V @ M_MV.T
 
-    # 5. 最終亮度輸出
-    brightness = (I_diffuse_p * L_p_intensity) + \
-                 (I_diffuse_d * L_d_intensity) + \
-                 L_a_intensity
-    brightness = min(1.0, brightness) # Clamp 避免過曝
+    # 2~5. 法向量正規化 + 所有光源的漫反射
+    N_hat = normalize_rows(N @ M_MV[:3, :3].T)
+    brightness = frame_lights.shade(V_prime[:, :3], N_hat)
 
     # 6. 座標輸出
-    V_z_prime = V_prime[2]
+    V_z_prime = V_prime[:, 2]
     dist_sq = V_z_prime * V_z_prime
-    inv_Pz = 0 if dist_sq < 1e-9 else 1.0 / np.sqrt(dist_sq)
+    inv_Pz = np.zeros_like(dist_sq)
+    np.divide(1.0, np.sqrt(dist_sq), out=inv_Pz, where=dist_sq >= 1e-9)
 
-    # 投影變換 Px, Py (原點在中心)
-    P_x = V_prime[0] * P_scale_x * inv_Pz
-    P_y = V_prime[1] * P_scale_y * inv_Pz
+    P_x = V_prime[:, 0] * P_scale_x * inv_Pz
+    P_y = V_prime[:, 1] * P_scale_y * inv_Pz
 
-    return P_x, P_y, inv_Pz, brightness
+    return P_x, P_y, inv_Pz, brightness, V_z_prime
 
 # ==========================================
 # 4. OBJ Loader
@@ -316,6 +380,72 @@ def normalize_model(triangles):
 class Model:
     def __init__(self, triangles):
         self.triangles = triangles # list of [(v1, n1), (v2, n2), (v3, n3), color_str]
+        self._arrays = None
+        self._edges = None
+
+    def get_arrays(self):
+        """
+        將三角形轉成 numpy 陣列 (第一次呼叫時建立並快取):
+        V: (T, 3, 4), N: (T, 3, 3), colors: (T, 3) RGB
+        """
+        if self._arrays is None:
+            V = np.array([[v for v, n in t[:3]] for t in self.triangles], dtype=float).reshape(-1, 3, 4)
+            N = np.array([[n for v, n in t[:3]] for t in self.triangles], dtype=float).reshape(-1, 3, 3)
+            colors = np.array([hex_to_rgb(t[3]) for t in self.triangles], dtype=float).reshape(-1, 3)
+            self._arrays = (V, N, colors)
+        return self._arrays
+
+    def get_edges(self):
+        """
+        取出模型所有不重複的邊 (第一次呼叫時建立並快取):
+        positions: (U, 4) 不重複的頂點座標, edges: (E, 2) 對應 positions 的索引
+        """
+        if self._edges is None:
+            V, _, _ = self.get_arrays()
+            positions, inverse = np.unique(V.reshape(-1, 4), axis=0, return_inverse=True)
+            tri = inverse.reshape(-1, 3)
+            e = np.concatenate([tri[:, [0, 1]], tri[:, [1, 2]], tri[:, [2, 0]]])
+            e.sort(axis=1)
+            e = e[e[:, 0] != e[:, 1]] # 退化三角形
+            self._edges = (positions, np.unique(e, axis=0))
+        return self._edges
+
+    def iter_chunks(self, chunk_size=65536):
+        """以 chunk 方式產生 (V, N, colors), 與 obj_stream.StreamingModel 介面相同"""
+        V, N, colors = self.get_arrays()
+        for start in range(0, len(V), chunk_size):
+            end = start + chunk_size
+            yield V[start:end], N[start:end], colors[start:end]
+
+class IndexedModel(Model):
+    """
+    共用頂點的模型 (例如 mesh_opt.IndexedMesh): vertices (U, 4), normals (U, 3), indices (T, 3)
+    render_scene 的 vertex stage 每個不重複頂點只算一次, 再依 index buffer 的三角形順序組成三角形
+    vertices 以與 normalize_model 相同的方式正規化 (三角形頂點平均為中心, 最遠距離為 1)
+    """
+    def __init__(self, vertices, normals, indices, color):
+        super().__init__(triangles=None)
+        corners = vertices[indices.reshape(-1), :3]
+        centroid = np.mean(corners, axis=0)
+        max_dist = np.max(np.linalg.norm(corners - centroid, axis=1))
+        scale_factor = 1.0 / max_dist
+        print(f"Model Centroid: {centroid}, Max Scale: {max_dist}")
+
+        self.vertices = np.ones((len(vertices), 4))
+        self.vertices[:, :3] = (vertices[:, :3] - centroid) * scale_factor
+        self.normals = np.asarray(normals, dtype=float)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.colors = np.broadcast_to(hex_to_rgb(color), (len(self.indices), 3))
+
+    def get_indexed(self):
+        """vertices: (U, 4), normals: (U, 3), indices: (T, 3), colors: (T, 3)"""
+        return self.vertices, self.normals, self.indices, self.colors
+
+    def get_arrays(self):
+        # 展開成每個三角形 3 個頂點 (streaming / wireframe 等模式使用)
+        if self._arrays is None:
+            self._arrays = (self.vertices[self.indices], self.normals[self.indices], self.colors)
+        return self._arrays
 
 class Instance:
     def __init__(self, model, position, scale=1.0, rotation_y=0):
@@ -345,14 +475,13 @@ def hex_to_rgb(hex_color):
         'green': np.array([0.0, 1.0, 0.0]),
         'blue':  np.array([0.0, 0.0, 1.0]),
         'gray':  np.array([0.5, 0.5, 0.5]),
+        'white': np.array([1.0, 1.0, 1.0]),
+        'black': np.array([0.0, 0.0, 0.0]),
         # 你也可以在這裡加新顏色
     }
     return colors.get(hex_color, np.array([1.0, 1.0, 1.0]))
 
-def render_scene(camera, instances, width, height):
-    rasterizer = Rasterizer(width, height)
-    M_view = camera.get_view_matrix()
-    
+def get_projection(width, height):
     # === 修正 1: 保持長寬比 ===
     # 使用相同數值，避免畫面拉伸變形
     scale = min(width, height) / 2.0
@@ -361,45 +490,100 @@ def render_scene(camera, instances, width, height):
 
     OFFSET_X = width / 2
     OFFSET_Y = height / 2
+    return P_SCALE_X, P_SCALE_Y, OFFSET_X, OFFSET_Y
+
+def process_triangles(V, N, M_MV, projection, frame_lights, fmt=None, indices=None):
+    """
+    對 T 個三角形做 vertex stage, 回傳螢幕座標
+    V: (T, 3, 4), N: (T, 3, 3)
+    fmt: floatfmt.FloatFormat, 以該浮點格式模擬 vertex stage (None 為 float64)
+    indices: (T, 3) index buffer; 此時 V: (U, 4), N: (U, 3) 為不重複頂點, 每個頂點只算一次
+    回傳 screen_x, screen_y, brightness, inv_Pz, V'z: 皆為 (T, 3)
+          valid: (T,) 通過近平面 clipping 的三角形
+    """
+    P_SCALE_X, P_SCALE_Y, OFFSET_X, OFFSET_Y = projection
+    T = len(V) if indices is None else len(indices)
+    if fmt is None:
+        px, py, inv_pz, bright, vz = vertex_processing_batch(
+            V.reshape(-1, 4), N.reshape(-1, 3), M_MV, P_SCALE_X, P_SCALE_Y, frame_lights)
+    else:
+        px, py, inv_pz, bright, vz = vertex_processing_emulated(
+            V.reshape(-1, 4), N.reshape(-1, 3), M_MV, P_SCALE_X, P_SCALE_Y, frame_lights, fmt)
+
+    def corners(a):
+        # 依 index buffer 把頂點結果組成三角形
+        return (a if indices is None else a[indices]).reshape(T, 3)
+
+    screen_x = corners(OFFSET_X + px)
+    screen_y = corners(OFFSET_Y - py)
+    vz = corners(vz)
+
+    # 簡單 Clipping: 任一頂點在近平面之後就丟掉整個三角形
+    valid = np.all(vz < -0.1, axis=1)
+    return screen_x, screen_y, corners(bright), corners(inv_pz), vz, valid
+
+def project_vertices(V, M_MV, projection):
+    """
+    只做座標變換與投影 (不算光照), 用於 wireframe
+    V: (K, 4), 回傳 screen_x, screen_y, inv_Pz, V'z: 皆為 (K,)
+    """
+    P_SCALE_X, P_SCALE_Y, OFFSET_X, OFFSET_Y = projection
+    V_prime = V @ M_MV.T
+    V_z_prime = V_prime[:, 2]
+    dist_sq = V_z_prime * V_z_prime
+    inv_Pz = np.zeros_like(dist_sq)
+    np.divide(1.0, np.sqrt(dist_sq), out=inv_Pz, where=dist_sq >= 1e-9)
+    screen_x = OFFSET_X + V_prime[:, 0] * P_SCALE_X * inv_Pz
+    screen_y = OFFSET_Y - V_prime[:, 1] * P_SCALE_Y * inv_Pz
+    return screen_x, screen_y, inv_Pz, V_z_prime
+
+def render_scene(camera, instances, width, height, lights=None, counter=None, fmt=None):
+    """
+    counter: workload.WorkloadCounter, 記錄這個 frame 硬體 vertex stage 要執行的運算量
+    fmt: floatfmt.FloatFormat, vertex stage 使用的浮點格式 (None 為 float64)
+    """
+    rasterizer = Rasterizer(width, height)
+    M_view = camera.get_view_matrix()
+
+    # 光源常數每個 frame 只算一次 (view space 位置 / 正規化方向)
+    if lights is None:
+        lights = scene_lights
+    frame_lights = lights.prepare(M_view)
+    projection = get_projection(width, height)
+    if counter is not None:
+        counter.begin_frame(frame_lights)
 
     print("Rendering...")
 
     # 收集場景中所有要畫的三角形 (用於排序)
     render_list = []
 
-    for instance in instances:
+    for instance in tqdm(instances, desc='Vertex processing'):
         M_MV = M_view @ instance.transform_matrix
-        
-        for tri in tqdm(instance.model.triangles, desc='Vertex processing'):
-            v_data = tri[:3]
-            color_name = tri[3]
-            base_color = hex_to_rgb(color_name)
-
-            avg_z = 0.0
-            temp_raster_points = []
-            valid_triangle = True
-            
-            for v, n in v_data:
-                # Vertex Pipeline
-                px, py, inv_pz, bright = vertex_processing_pipeline(v, n, M_MV, P_SCALE_X, P_SCALE_Y)
-                
-                # 簡單 Clipping
-                V_prime = M_MV @ v
-                if V_prime[2] >= -0.1: 
-                     valid_triangle = False
-                
-                avg_z += V_prime[2]
-                screen_x = OFFSET_X + px
-                screen_y = OFFSET_Y - py 
-                temp_raster_points.append((screen_x, screen_y, bright))
-
-            if valid_triangle:
-                avg_z /= 3.0
-                render_list.append({
-                    'z': avg_z,
-                    'points': temp_raster_points,
-                    'color': base_color
-                })
+        # 每個 instance 都要送一次 header (與 render_scene_streaming 相同, 空模型也算)
+        if counter is not None:
+            counter.add_instance()
+        if isinstance(instance.model, IndexedModel):
+            # 不重複頂點只做一次 vertex stage
+            V, N, indices, colors = instance.model.get_indexed()
+        else:
+            V, N, colors = instance.model.get_arrays()
+            indices = None
+        if len(colors) == 0: continue
+
+        # Vertex Pipeline: 所有頂點一次處理
+        screen_x, screen_y, bright, _, vz, valid = process_triangles(V, N, M_MV, projection, frame_lights, fmt,
+                                                                     indices)
+        if counter is not None:
+            counter.add_triangles(len(colors), int(valid.sum()), None if indices is None else len(V))
+        avg_z = vz.sum(axis=1) / 3.0
+
+        for t in np.nonzero(valid)[0]:
+            render_list.append({
+                'z': avg_z[t],
+                'points': list(zip(screen_x[t], screen_y[t], bright[t])),
+                'color': colors[t]
+            })
 
     # === 修正 2: 畫家演算法 (Painter's Algorithm) ===
     # 根據 Z 值排序：由小到大 (因為相機看向 -Z，越小的負數越遠)
@@ -414,6 +598,71 @@ def render_scene(camera, instances, width, height):
 
     return rasterizer.canvas
 
+def render_scene_streaming(camera, instances, width, height, lights=None, rasterizer=None, counter=None,
+                           fmt=None):
+    """
+    串流版 render_scene: 每個模型以固定大小的 chunk 送進 vertex stage 後直接 rasterize
+    用 depth buffer 取代畫家演算法, 所以不需要保留 / 排序整個場景的三角形
+    instance.model 需提供 iter_chunks() (Model 或 obj_stream.StreamingModel)
+    rasterizer: 畫在既有的 Rasterizer 上 (需開啟 depth_test), 例如之後還要疊 wireframe
+    counter / fmt: 同 render_scene
+    """
+    if rasterizer is None:
+        rasterizer = Rasterizer(width, height, depth_test=True)
+    M_view = camera.get_view_matrix()
+
+    if lights is None:
+        lights = scene_lights
+    frame_lights = lights.prepare(M_view)
+    projection = get_projection(width, height)
+    if counter is not None:
+        counter.begin_frame(frame_lights)
+
+    print("Rendering (streaming)...")
+
+    for instance in instances:
+        M_MV = M_view @ instance.transform_matrix
+        if counter is not None:
+            counter.add_instance()
+        for V, N, colors in tqdm(instance.model.iter_chunks(), desc='Streaming chunks'):
+            screen_x, screen_y, bright, inv_pz, _, valid = process_triangles(V, N, M_MV, projection, frame_lights, fmt)
+            if counter is not None:
+                counter.add_triangles(len(V), int(valid.sum()))
+            for t in np.nonzero(valid)[0]:
+                p0, p1, p2 = zip(screen_x[t], screen_y[t], bright[t], inv_pz[t])
+                rasterizer.draw_shaded_triangle(p0, p1, p2, colors[t])
+
+    return rasterizer.canvas
+
+def render_wireframe(camera, instances, width, height, color='white', rasterizer=None, hidden_line=False,
+                     depth_bias=0.01):
+    """
+    Wireframe 模式: 收集每個模型不重複的邊, 一次向量化畫完
+    rasterizer: 疊加在既有畫面上 (例如 render_scene_streaming 的結果); None 則畫在黑底
+    hidden_line: 用 rasterizer 的 depth buffer 做深度測試, 被擋住的邊不畫
+    """
+    if rasterizer is None:
+        rasterizer = Rasterizer(width, height)
+    M_view = camera.get_view_matrix()
+    projection = get_projection(width, height)
+    line_color = hex_to_rgb(color)
+    bias = depth_bias if hidden_line else None
+
+    for instance in instances:
+        M_MV = M_view @ instance.transform_matrix
+        positions, edges = instance.model.get_edges()
+        if len(edges) == 0: continue
+
+        # 每個不重複頂點只投影一次
+        sx, sy, inv_pz, vz = project_vertices(positions, M_MV, projection)
+        # 簡單 Clipping: 端點在近平面之後的邊不畫
+        valid = (vz[edges[:, 0]] < -0.1) & (vz[edges[:, 1]] < -0.1)
+        e = edges[valid]
+        pts = np.stack([sx, sy, inv_pz], axis=1)
+        rasterizer.draw_lines(pts[e[:, 0]], pts[e[:, 1]], line_color, depth_bias=bias)
+
+    return rasterizer.canvas
+
 # ==========================================
 # 6. 執行
 # ==========================================
@@ -428,6 +677,13 @@ L_d = np.array([0.0, 0.0, 1.0])   # 方向光
 L_d_intensity = 0.4
 L_a_intensity = 0.2               # 環境光
 
+# 場景光源 (可放任意數量的 PointLight / DirectionalLight)
+# 上面的 L_p / L_d 沿用原本的定義: 直接視為 view space 座標
+scene_lights = Lights([
+    PointLight(L_p, L_p_intensity, space='view'),
+    DirectionalLight(L_d, L_d_intensity, space='view'),
+], ambient=L_a_intensity)
+
 scale = 1.3
 view_angle = 30
 instance_position = (0, 0, 0)
@@ -436,9 +692,41 @@ color = 'red'
 # color = np.array([0.3, 0.3, 0.3]) # [r,g,b] 0.0 ~ 1.0
 
 if __name__ == "__main__":
-    # inputs model name
-    if len(sys.argv) > 1:
-        model_name = sys.argv[1]
+    parser = argparse.ArgumentParser()
+    parser.add_argument('model_name', help='obj model name (without .obj)')
+    parser.add_argument('--stream', action='store_true',
+                        help='out-of-core mode: stream fixed-size face chunks from disk with a depth buffer')
+    parser.add_argument('--chunk-size', type=int, default=65536,
+                        help='triangles per chunk in --stream / --pipeline / --poster mode')
+    parser.add_argument('--pipeline', action='store_true',
+                        help='overlap parsing, vertex processing and rasterization in concurrent workers')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='raster workers in --pipeline mode (default: CPU count - 1)')
+    parser.add_argument('--wireframe', choices=['only', 'overlay', 'hidden'], default=None,
+                        help='draw mesh edges: only (edges on black), overlay (over the shaded render), '
+                             'hidden (over the shaded render, depth-tested)')
+    parser.add_argument('--wire-color', default='white', help='wireframe color name')
+    parser.add_argument('--poster', metavar='WxH', default=None,
+                        help='large-output mode: render WxH tile by tile into a memory-mapped framebuffer '
+                             'and encode PNG/TIFF strips in the background')
+    parser.add_argument('--tile', type=int, default=1024, help='tile size in --poster mode')
+    parser.add_argument('--format', choices=['png', 'tif'], default='png', help='output format in --poster mode')
+    parser.add_argument('--float-format', default=None,
+                        help='emulate the vertex stage in this float format (fp32, fp24, tf32, fp16, bf16 or eXmY)')
+    parser.add_argument('--float-round', choices=['nearest', 'trunc'], default='nearest',
+                        help='rounding of the emulated float format')
+    parser.add_argument('--optimize-mesh', action='store_true',
+                        help='render from the vertex-cache optimized index buffer: unique vertices are '
+                             'transformed once (result kept in models/.mesh_cache)')
+    parser.add_argument('--vertex-cache', type=int, default=16, help='cache size targeted by --optimize-mesh')
+    args = parser.parse_args()
+    model_name = args.model_name
+    if args.float_format and args.wireframe:
+        parser.error('--float-format is not supported with --wireframe (edges are projected in float64)')
+    if args.optimize_mesh and (args.stream or args.pipeline or args.poster):
+        parser.error('--optimize-mesh is not supported with --stream / --pipeline / --poster '
+                     '(those modes stream the OBJ without an index buffer)')
+    fmt = parse_format(args.float_format, args.float_round) if args.float_format else None
     
     # load obj model
     model_dir = './models'
@@ -446,26 +734,85 @@ if __name__ == "__main__":
     os.makedirs(model_dir, exist_ok=True)
     model_path = os.path.join(model_dir, model_file)
 
-    triangles = load_obj(model_path)
-    
-    if triangles:
-        # 1. 正規化模型 (重要!)
-        normalized_triangles = normalize_model(triangles)
-        for tri in normalized_triangles:
-            tri[3] = color
-        norm_model = Model(normalized_triangles)
-
-        # 2. 設定相機
-        camera = Camera(position=camera_position, rotation_y=0) 
-        
-        # 3. 建立實例
-        instances = [
-            Instance(norm_model, position=instance_position, scale=scale, rotation_y=view_angle) 
-        ]
-
-        # render and rasterize
-        final_image = render_scene(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT)
-
+    # 2. 設定相機
+    camera = Camera(position=camera_position, rotation_y=0) 
+
+    final_image = None
+    if args.poster:
+        if os.path.exists(model_path):
+            # Poster 模式: 模型以串流方式讀入, 畫面分 tile 渲染後直接寫檔
+            from poster import render_poster
+            poster_w, poster_h = (int(v) for v in args.poster.lower().split('x'))
+            output_dir = './outputs'
+            os.makedirs(output_dir, exist_ok=True)
+            output_path = os.path.join(output_dir, f"{model_name}_{poster_w}x{poster_h}.{args.format}")
+            with StreamingModel(model_path, hex_to_rgb(color), chunk_size=args.chunk_size) as stream_model:
+                instances = [
+                    Instance(stream_model, position=instance_position, scale=scale, rotation_y=view_angle)
+                ]
+                render_poster(camera, instances, poster_w, poster_h, output_path, tile_size=args.tile,
+                              fmt=fmt)
+        else:
+            print(f"Error: File {model_path} not found.")
+            sys.exit(1)
+        sys.exit(0)
+    elif args.pipeline:
+        if os.path.exists(model_path):
+            # Pipelined 模式: parser / vertex / raster 同時執行
+            from pipeline import ObjSource, render_scene_pipelined
+            source = ObjSource(model_path, hex_to_rgb(color), chunk_size=args.chunk_size)
+            instances = [
+                Instance(source, position=instance_position, scale=scale, rotation_y=view_angle)
+            ]
+            final_image = render_scene_pipelined(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT,
+                                                 raster_workers=args.workers, fmt=fmt)
+        else:
+            print(f"Error: File {model_path} not found.")
+            sys.exit(1)
+    elif args.stream:
+        if os.path.exists(model_path):
+            # 串流模式: 模型不載入記憶體, 記憶體用量由 chunk size 決定
+            with StreamingModel(model_path, hex_to_rgb(color), chunk_size=args.chunk_size) as stream_model:
+                instances = [
+                    Instance(stream_model, position=instance_position, scale=scale, rotation_y=view_angle)
+                ]
+                final_image = render_scene_streaming(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT, fmt=fmt)
+        else:
+            print(f"Error: File {model_path} not found.")
+            sys.exit(1)
+    else:
+        triangles = load_obj(model_path)
+        if triangles:
+            if args.optimize_mesh:
+                # index buffer 依 vertex cache 重排, vertex stage 每個不重複頂點只算一次
+                from mesh_opt import load_optimized
+                mesh = load_optimized(model_path, triangles, args.vertex_cache)
+                norm_model = IndexedModel(mesh.vertices, mesh.normals, mesh.indices, color)
+            else:
+                # 1. 正規化模型 (重要!)
+                normalized_triangles = normalize_model(triangles)
+                for tri in normalized_triangles:
+                    tri[3] = color
+                norm_model = Model(normalized_triangles)
+
+            # 3. 建立實例
+            instances = [
+                Instance(norm_model, position=instance_position, scale=scale, rotation_y=view_angle) 
+            ]
+
+            # render and rasterize
+            if args.wireframe == 'only':
+                final_image = render_wireframe(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT, color=args.wire_color)
+            elif args.wireframe:
+                # wireframe 疊在 depth-buffered 的填色結果上
+                rasterizer = Rasterizer(CANVAS_WIDTH, CANVAS_HEIGHT, depth_test=True)
+                render_scene_streaming(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT, rasterizer=rasterizer)
+                final_image = render_wireframe(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT, color=args.wire_color,
+                                               rasterizer=rasterizer, hidden_line=(args.wireframe == 'hidden'))
+            else:
+                final_image = render_scene(camera, instances, CANVAS_WIDTH, CANVAS_HEIGHT, fmt=fmt)
+
+    if final_image is not None:
         # outputs
         output_dir = './outputs'
         os.makedirs(output_dir, exist_ok=True)
@@ -475,3 +822,4 @@ if __name__ == "__main__":
         print(f"Render finished. Image saved to: {output_path}")
     else:
         print("Model not loaded.")
+        sys.exit(1)
@@ -0,0 +1,239 @@
+import os
+import sys
+import json
+import argparse
+import numpy as np
+
+# ==========================================
+# 可調浮點格式模擬 (vertex datapath 格式探索)
+# ==========================================
+"""
+FloatFormat(exp_bits, man_bits, rounding) 以 float64 陣列模擬任意寬度的浮點格式:
+    - rounding='nearest': round-to-nearest-even; 'trunc': 無條件捨去 (round toward zero)
+    - 沒有 denormal (小於最小 normal 的值 flush 成 0), 沒有 Inf (超出範圍飽和到最大有限值)
+每個運算 (mul / add / dot3 / mv / inv_sqrt / normalize3) 都先以 float64 精確算出再 quantize,
+運算順序與 RTL 相同 (mv: (p0+p1)+(p2+p3), dot3: (p0+p1)+p2)。
+'trunc' 是對精確結果截斷; RTL 對齊時沒有 sticky bit 的額外誤差見 sim/fp_accuracy.py。
+1/sqrt 以精確值 quantize (fast_inv_sqrt 的 magic constant 只適用 fp32)。
+
+draw.render_scene(..., fmt=FloatFormat(...)) 會用 vertex_processing_emulated 取代 float64 的 vertex stage;
+sim/gen_vtx.py --float-format 用同樣的運算產生 golden output。
+"""
+
+# 常見格式 (exp_bits, man_bits)
+FORMATS = {
+    'fp32': (8, 23),
+    'fp24': (7, 16),
+    'tf32': (8, 10),
+    'fp16': (5, 10),
+    'bf16': (8, 7),
+}
+
+class FloatFormat:
+    def __init__(self, exp_bits, man_bits, rounding='nearest', name=None):
+        if rounding not in ('nearest', 'trunc'):
+            raise ValueError(f"rounding must be 'nearest' or 'trunc', got {rounding!r}")
+        # 兩個該格式的數相乘在 float64 中必須是精確的
+        if not (2 <= exp_bits <= 11 and 1 <= man_bits <= 25):
+            raise ValueError(f"unsupported format: exp_bits={exp_bits}, man_bits={man_bits}")
+        self.exp_bits = int(exp_bits)
+        self.man_bits = int(man_bits)
+        self.rounding = rounding
+        self.name = name or f"e{exp_bits}m{man_bits}"
+        self.bias = (1 << (self.exp_bits - 1)) - 1
+        self.min_normal = 2.0 ** (1 - self.bias)
+        self.max_value = (2.0 - 2.0 ** -self.man_bits) * 2.0 ** self.bias
+
+    @property
+    def label(self):
+        return f"{self.name}-{'rn' if self.rounding == 'nearest' else 'rz'}"
+
+    @property
+    def bits(self):
+        return 1 + self.exp_bits + self.man_bits
+
+    def __repr__(self):
+        return f"FloatFormat({self.exp_bits}, {self.man_bits}, {self.rounding!r}, name={self.name!r})"
+
+    def quantize(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        m, e = np.frexp(x)  # x = m * 2^e, 0.5 <= |m| < 1
+        m = np.ldexp(m, self.man_bits + 1)
+        m = np.rint(m) if self.rounding == 'nearest' else np.trunc(m)
+        y = np.ldexp(m, e - (self.man_bits + 1))
+        y = np.where(np.abs(y) < self.min_normal, np.copysign(0.0, x), y)
+        return np.clip(y, -self.max_value, self.max_value)
+
+    # ---- 單一運算: 輸入假設已是此格式 ----
+    def mul(self, a, b):
+        return self.quantize(np.multiply(a, b))
+
+    def add(self, a, b):
+        return self.quantize(np.add(a, b))
+
+    def sub(self, a, b):
+        return self.quantize(np.subtract(a, b))
+
+    def inv_sqrt(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        out = np.zeros_like(x)
+        np.divide(1.0, np.sqrt(x, where=x > 0, out=np.zeros_like(x)), out=out, where=x > 0)
+        return self.quantize(out)
+
+    # ---- 組合單元 (與 RTL 相同的加法順序) ----
+    def dot3(self, a, b):
+        p = self.mul(a, b)
+        return self.add(self.add(p[..., 0], p[..., 1]), p[..., 2])
+
+    def mv(self, M, V):
+        """M: (R, C), V: (..., C) -> (..., R); C = 4 走 mv_mul_4x4 的加法樹, C = 3 走 dot3"""
+        p = self.mul(np.asarray(V)[..., np.newaxis, :], M)
+        if p.shape[-1] == 4:
+            return self.add(self.add(p[..., 0], p[..., 1]), self.add(p[..., 2], p[..., 3]))
+        return self.add(self.add(p[..., 0], p[..., 1]), p[..., 2])
+
+    def normalize3(self, v):
+        inv = self.inv_sqrt(self.dot3(v, v))
+        return self.mul(v, inv[..., np.newaxis])
+
+def parse_format(spec, rounding='nearest'):
+    """'bf16' / 'fp16' / ... 或 'e5m10' 形式的自訂格式"""
+    spec = spec.lower()
+    if spec in FORMATS:
+        return FloatFormat(*FORMATS[spec], rounding=rounding, name=spec)
+    if spec.startswith('e') and 'm' in spec:
+        e, m = spec[1:].split('m', 1)
+        return FloatFormat(int(e), int(m), rounding=rounding)
+    raise ValueError(f"unknown float format {spec!r} (use {', '.join(FORMATS)} or eXmY)")
+
+# ==========================================
+# 以指定格式執行的 vertex stage
+# ==========================================
+def accumulate_brightness(N_hat, L_hats, intensities, ambient, fmt):
+    """
+    與 RTL / sim/gen_vtx.py 相同的累加順序: 漫反射項依光源順序相加, 環境光最後加
+        ((max(0, N·L_0) * I_0 + max(0, N·L_1) * I_1) + ...) + ambient
+    L_hats: 每個光源已正規化的方向 ((K, 3) 或 (3,)), 不做 clamp
+    """
+    acc = None
+    for L_hat, intensity in zip(L_hats, intensities):
+        term = fmt.mul(np.maximum(0.0, fmt.dot3(N_hat, L_hat)), intensity)
+        acc = term if acc is None else fmt.add(acc, term)
+    ambient = fmt.quantize(ambient)
+    return np.full(len(N_hat), ambient) if acc is None else fmt.add(acc, ambient)
+
+def shade_emulated(frame_lights, V_xyz, N_hat, fmt):
+    """FrameLights.shade 的格式模擬版: 點光源 L_p' 逐頂點正規化, 累加順序見 accumulate_brightness"""
+    q = fmt.quantize
+    L_hats = [fmt.normalize3(fmt.sub(pos, V_xyz)) for pos in q(frame_lights.point_pos)]
+    L_hats += list(q(frame_lights.dir_hat))
+    intensities = list(q(frame_lights.point_intensity)) + list(q(frame_lights.dir_intensity))
+    return np.minimum(1.0, accumulate_brightness(N_hat, L_hats, intensities, frame_lights.ambient, fmt))
+
+def vertex_processing_emulated(V, N, M_MV, P_scale_x, P_scale_y, frame_lights, fmt):
+    """
+    vertex_processing_batch 的格式模擬版: 輸入與每個中間結果都 quantize 到 fmt
+    V: (K, 4), N: (K, 3); Output: Px, Py, inv_Pz, Brightness, V'z  (皆為 (K,))
+    """
+    q = fmt.quantize
+    M = q(M_MV)
+    V_prime = fmt.mv(M, q(V))
+    N_hat = fmt.normalize3(fmt.mv(M[:3, :3], q(N)))
+    brightness = shade_emulated(frame_lights, V_prime[:, :3], N_hat, fmt)
+
+    V_z_prime = V_prime[:, 2]
+    dist_sq = fmt.mul(V_z_prime, V_z_prime)
+    inv_Pz = np.where(dist_sq >= 1e-9, fmt.inv_sqrt(dist_sq), 0.0)
+
+    P_x = fmt.mul(fmt.mul(V_prime[:, 0], q(P_scale_x)), inv_Pz)
+    P_y = fmt.mul(fmt.mul(V_prime[:, 1], q(P_scale_y)), inv_Pz)
+
+    return P_x, P_y, inv_Pz, brightness, V_z_prime
+
+# ==========================================
+# 誤差統計
+# ==========================================
+def psnr(image, reference):
+    mse = np.mean((np.clip(image, 0.0, 1.0) - np.clip(reference, 0.0, 1.0)) ** 2)
+    return float('inf') if mse == 0 else 10.0 * np.log10(1.0 / mse)
+
+def vertex_error(out, ref):
+    """
+    out / ref: process_triangles 的輸出 (screen_x, screen_y, bright, inv_pz, vz, valid)
+    只比較兩者都通過 clipping 的三角形
+    """
+    sx, sy, br, ipz, _, valid = out
+    rx, ry, rbr, ripz, _, rvalid = ref
+    both = valid & rvalid
+    d_xy = np.hypot(sx - rx, sy - ry)[both]
+    d_br = np.abs(br - rbr)[both]
+    rel_z = (np.abs(ipz - ripz) / np.maximum(np.abs(ripz), 1e-30))[both]
+    if d_xy.size == 0:
+        d_xy = d_br = rel_z = np.zeros(1)
+    return {
+        'screen_mean_px': float(d_xy.mean()),
+        'screen_max_px': float(d_xy.max()),
+        'bright_mean': float(d_br.mean()),
+        'bright_max': float(d_br.max()),
+        'inv_pz_max_rel': float(rel_z.max()),
+        'clip_changed': int((valid != rvalid).sum()),
+    }
+
+if __name__ == "__main__":
+    import draw
+
+    parser = argparse.ArgumentParser(description='compare vertex-stage float formats against the float64 render')
+    parser.add_argument('models', nargs='*', help='model names (default: every .obj in ./models)')
+    parser.add_argument('--formats', nargs='+', default=['fp32', 'fp24', 'tf32', 'fp16', 'bf16'],
+                        help=f"format names ({', '.join(FORMATS)}) or eXmY")
+    parser.add_argument('--rounding', nargs='+', choices=['nearest', 'trunc'], default=['nearest', 'trunc'])
+    parser.add_argument('--width', type=int, default=320)
+    parser.add_argument('--height', type=int, default=240)
+    parser.add_argument('--json', default=None, help='also write the results to this file')
+    args = parser.parse_args()
+
+    model_dir = './models'
+    names = args.models or sorted(os.path.splitext(f)[0] for f in os.listdir(model_dir) if f.endswith('.obj'))
+    formats = [parse_format(f, r) for f in args.formats for r in args.rounding]
+
+    results = {}
+    for name in names:
+        triangles = draw.load_obj(os.path.join(model_dir, name + '.obj'))
+        if not triangles:
+            continue
+        normalized_triangles = draw.normalize_model(triangles)
+        for tri in normalized_triangles:
+            tri[3] = draw.color
+        model = draw.Model(normalized_triangles)
+        camera = draw.Camera(position=draw.camera_position, rotation_y=0)
+        instance = draw.Instance(model, position=draw.instance_position, scale=draw.scale,
+                                 rotation_y=draw.view_angle)
+
+        # 頂點誤差: 直接比較 vertex stage 輸出
+        M_MV = camera.get_view_matrix() @ instance.transform_matrix
+        frame_lights = draw.scene_lights.prepare(camera.get_view_matrix())
+        projection = draw.get_projection(args.width, args.height)
+        V, N, _ = model.get_arrays()
+        ref_vertices = draw.process_triangles(V, N, M_MV, projection, frame_lights)
+        ref_image = draw.render_scene(camera, [instance], args.width, args.height)
+
+        results[name] = {}
+        for fmt in formats:
+            out = draw.process_triangles(V, N, M_MV, projection, frame_lights, fmt=fmt)
+            image = draw.render_scene(camera, [instance], args.width, args.height, fmt=fmt)
+            results[name][fmt.label] = dict(bits=fmt.bits, psnr_db=psnr(image, ref_image),
+                                            **vertex_error(out, ref_vertices))
+
+        print(f"== {name} ({len(V)} triangles, {args.width}x{args.height})")
+        print(f"   {'format':10s} {'bits':>4s} {'PSNR dB':>8s} {'xy mean px':>11s} {'xy max px':>10s} "
+              f"{'bright max':>11s} {'1/z max rel':>12s} {'clip diff':>9s}")
+        for label, r in results[name].items():
+            print(f"   {label:10s} {r['bits']:4d} {r['psnr_db']:8.2f} {r['screen_mean_px']:11.4f} "
+                  f"{r['screen_max_px']:10.4f} {r['bright_max']:11.2e} {r['inv_pz_max_rel']:12.2e} "
+                  f"{r['clip_changed']:9d}")
+        sys.stdout.flush()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'width': args.width, 'height': args.height, 'results': results}, f, indent=2)
+        print(f"Results saved to: {args.json}")
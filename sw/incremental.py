@@ -0,0 +1,202 @@
+import time
+import argparse
+import numpy as np
+
+from draw import Rasterizer, get_projection, process_triangles, scene_lights
+
+# ==========================================
+# Incremental re-render: 只重畫有變動的區域 (dirty rectangles)
+# ==========================================
+"""
+互動編輯場景時一次只移動一個 Instance, render_scene 卻每次都重畫整張畫面。
+IncrementalRenderer 保留上一個 frame 的 canvas / depth buffer, 以及每個 instance 的:
+    - transform_matrix (用來偵測移動)
+    - vertex stage 的輸出 (投影後的三角形, 沒變動的 instance 不必重算)
+    - 螢幕上的範圍 (rect)
+render(instances) 時, 有變動 (移動 / 新增 / 刪除) 的 instance 舊 rect 與新 rect 就是 dirty rect;
+每個 dirty rect 清空後, 只把與它重疊的 instance (的三角形) 重新 rasterize 到該區域。
+使用 depth buffer, 所以區域內的重畫順序不影響結果, 與 render_scene_streaming 的整張畫面相同。
+相機移動時整張重畫; model 的內容被修改時需呼叫 invalidate(instance)。
+"""
+
+class _Entry:
+    def __init__(self, instance, matrix, pts, colors, bbox, rect):
+        self.instance = instance
+        self.matrix = matrix     # 投影時的 transform_matrix (None 代表需要重算)
+        self.pts = pts           # (T, 3, 4): 螢幕座標 x, y, 亮度 h, 1/z
+        self.colors = colors     # (T, 3)
+        self.bbox = bbox         # (T, 4): xmin, xmax, ymin, ymax (與 draw_shaded_triangle 相同的取整)
+        self.rect = rect         # (x0, y0, x1, y1), x1 / y1 不含; 不在畫面上則為 None
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _merge_rects(rects):
+    """重疊的 rect 合併成外接矩形, 避免同一區域重畫兩次"""
+    rects = [r for r in rects if r is not None]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _overlaps(rects[i], rects[j]):
+                    a, b = rects[i], rects.pop(j)
+                    rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    merged = True
+                    break
+            if merged: break
+    return rects
+
+class IncrementalRenderer:
+    def __init__(self, camera, width, height, lights=None):
+        self.camera = camera
+        self.width, self.height = int(width), int(height)
+        self.lights = scene_lights if lights is None else lights
+        self.projection = get_projection(self.width, self.height)
+        self.canvas = np.zeros((self.height, self.width, 3))
+        self.depth = np.zeros((self.height, self.width))
+        self._entries = []
+        self._view = None
+        self._frame_lights = None
+        self.last_stats = None
+
+    def invalidate(self, instance=None):
+        """instance 的 model 被修改 (None: 下一次整張重畫)"""
+        if instance is None:
+            self._view = None
+            return
+        for e in self._entries:
+            if e.instance is instance:
+                e.matrix = None
+
+    def _project(self, instance, M_view):
+        """Vertex stage: 投影 instance 的所有三角形, 記錄每個三角形與整個 instance 的螢幕範圍"""
+        M_MV = M_view @ instance.transform_matrix
+        pts_list, color_list = [], []
+        for V, N, colors in instance.model.iter_chunks():
+            screen_x, screen_y, bright, inv_pz, _, valid = process_triangles(
+                V, N, M_MV, self.projection, self._frame_lights)
+            pts_list.append(np.stack([screen_x, screen_y, bright, inv_pz], axis=-1)[valid])
+            color_list.append(np.asarray(colors)[valid])
+        pts = np.concatenate(pts_list) if pts_list else np.zeros((0, 3, 4))
+        colors = np.concatenate(color_list) if color_list else np.zeros((0, 3))
+
+        xs, ys = np.round(pts[:, :, 0]), np.round(pts[:, :, 1])
+        bbox = np.stack([xs.min(axis=1), xs.max(axis=1), ys.min(axis=1), ys.max(axis=1)], axis=1) \
+            if len(pts) else np.zeros((0, 4))
+        # 畫面外的三角形不需要保留
+        on_screen = (bbox[:, 1] >= 0) & (bbox[:, 0] < self.width) & (bbox[:, 3] >= 0) & (bbox[:, 2] < self.height)
+        pts, colors, bbox = pts[on_screen], colors[on_screen], bbox[on_screen]
+
+        rect = None
+        if len(pts):
+            rect = (int(max(0, bbox[:, 0].min())), int(max(0, bbox[:, 2].min())),
+                    int(min(self.width, bbox[:, 1].max() + 1)), int(min(self.height, bbox[:, 3].max() + 1)))
+        return _Entry(instance, instance.transform_matrix.copy(), pts, colors, bbox, rect)
+
+    def _redraw(self, rect):
+        """清空 rect, 重畫所有與它重疊的三角形; 回傳畫了幾個三角形"""
+        x0, y0, x1, y1 = rect
+        tile = Rasterizer(x1 - x0, y1 - y0, depth_test=True)
+        count = 0
+        for e in self._entries:
+            if e.rect is None or not _overlaps(e.rect, rect): continue
+            sel = (e.bbox[:, 1] >= x0) & (e.bbox[:, 0] < x1) & (e.bbox[:, 3] >= y0) & (e.bbox[:, 2] < y1)
+            pts = e.pts[sel].copy()
+            pts[:, :, 0] -= x0
+            pts[:, :, 1] -= y0
+            colors = e.colors[sel]
+            for t in range(len(pts)):
+                tile.draw_shaded_triangle(pts[t, 0], pts[t, 1], pts[t, 2], colors[t])
+            count += len(pts)
+        self.canvas[y0:y1, x0:x1] = tile.canvas
+        self.depth[y0:y1, x0:x1] = tile.depth
+        return count
+
+    def render(self, instances):
+        """
+        畫出 instances 組成的場景, 只重畫與上一次呼叫相比有變動的區域
+        回傳 canvas; 這次的工作量記錄在 last_stats
+        """
+        M_view = self.camera.get_view_matrix()
+        full = self._view is None or not np.array_equal(M_view, self._view)
+        if full:
+            self._view = M_view.copy()
+            self._frame_lights = self.lights.prepare(M_view)
+
+        old = {id(e.instance): e for e in self._entries}
+        entries, dirty, changed = [], [], 0
+        for inst in instances:
+            e = old.pop(id(inst), None)
+            if full or e is None or e.matrix is None or not np.array_equal(e.matrix, inst.transform_matrix):
+                new = self._project(inst, M_view)
+                if e is not None: dirty.append(e.rect)
+                dirty.append(new.rect)
+                e = new
+                changed += 1
+            entries.append(e)
+        for e in old.values():
+            # 已移除的 instance
+            dirty.append(e.rect)
+            changed += 1
+        self._entries = entries
+
+        rects = [(0, 0, self.width, self.height)] if full else _merge_rects(dirty)
+        triangles = sum(self._redraw(r) for r in rects)
+        pixels = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rects)
+        self.last_stats = {
+            'full': full,
+            'changed_instances': changed,
+            'rects': rects,
+            'dirty_pixels': pixels,
+            'dirty_fraction': pixels / float(self.width * self.height),
+            'triangles': triangles,
+        }
+        return self.canvas
+
+if __name__ == "__main__":
+    import os
+    import draw
+
+    parser = argparse.ArgumentParser(description='move one instance per frame and re-render only the dirty regions')
+    parser.add_argument('model_name', help='obj model name (without .obj)')
+    parser.add_argument('--frames', type=int, default=5, help='number of edit frames')
+    parser.add_argument('--step', type=float, default=0.05, help='x offset applied to the moved instance per frame')
+    parser.add_argument('--grid', type=int, default=3, help='scene is a grid x grid layout of instances')
+    parser.add_argument('--check', action='store_true', help='compare the last frame with a full streaming render')
+    args = parser.parse_args()
+
+    triangles = draw.load_obj(os.path.join('./models', args.model_name + '.obj'))
+    if not triangles:
+        raise SystemExit(1)
+    normalized_triangles = draw.normalize_model(triangles)
+    for tri in normalized_triangles:
+        tri[3] = draw.color
+    model = draw.Model(normalized_triangles)
+
+    camera = draw.Camera(position=draw.camera_position, rotation_y=0)
+    spacing = 2.0 / args.grid
+    offsets = (np.arange(args.grid) - (args.grid - 1) / 2.0) * spacing
+    instances = [draw.Instance(model, position=(x, y, 0), scale=draw.scale / args.grid, rotation_y=draw.view_angle)
+                 for y in offsets for x in offsets]
+
+    renderer = IncrementalRenderer(camera, draw.CANVAS_WIDTH, draw.CANVAS_HEIGHT)
+    t0 = time.perf_counter()
+    renderer.render(instances)
+    t_full = time.perf_counter() - t0
+    print(f"Full frame: {renderer.last_stats['triangles']} triangles in {t_full:.3f}s")
+
+    moved = instances[len(instances) // 2]
+    for frame in range(args.frames):
+        moved.transform_matrix = draw.make_translation_matrix(args.step, 0, 0) @ moved.transform_matrix
+        t0 = time.perf_counter()
+        renderer.render(instances)
+        dt = time.perf_counter() - t0
+        s = renderer.last_stats
+        print(f"Edit {frame + 1}: {len(s['rects'])} dirty rect(s), {s['dirty_fraction']:.1%} of the frame, "
+              f"{s['triangles']} triangles in {dt:.3f}s ({dt / t_full:.1%} of a full frame)")
+
+    if args.check:
+        reference = draw.render_scene_streaming(camera, instances, draw.CANVAS_WIDTH, draw.CANVAS_HEIGHT)
+        diff = np.any(np.abs(reference - renderer.canvas) > 1e-12, axis=-1)
+        print(f"Check vs full streaming render: {int(diff.sum())} differing pixels")
@@ -0,0 +1,107 @@
+import numpy as np
+
+# ==========================================
+# 光照模組: 任意數量的點光源 / 方向光
+# 參考: Gabriel Gambetta - Computer Graphics from Scratch (Ch 13 Shading)
+# ==========================================
+"""
+使用方式:
+    lights = Lights([PointLight(...), DirectionalLight(...)], ambient=0.2)
+    frame = lights.prepare(M_view)        # 每個 frame 只做一次
+    brightness = frame.shade(V_xyz, N_hat) # 所有頂點 x 所有光源一次算完
+
+space:
+    'world' : 光源定義在世界座標, prepare() 時用 M_view 轉到 view space
+    'view'  : 光源已經在 view space (與原本 draw.py 的 L_p / L_d 相同)
+"""
+
+def normalize_rows(v):
+    """
+    逐列正規化 (..., 3) 陣列, 長度為 0 的向量保持原樣 (與 normalize() 相同行為)
+    """
+    norm = np.sqrt(np.einsum('...i,...i->...', v, v))
+    safe = np.where(norm == 0, 1.0, norm)
+    return v / safe[..., np.newaxis]
+
+class PointLight:
+    def __init__(self, position, intensity, space='world'):
+        self.position = np.asarray(position, dtype=float)[:3]
+        self.intensity = float(intensity)
+        self.space = space
+
+class DirectionalLight:
+    def __init__(self, direction, intensity, space='world'):
+        self.direction = np.asarray(direction, dtype=float)[:3]
+        self.intensity = float(intensity)
+        self.space = space
+
+class Lights:
+    def __init__(self, lights=(), ambient=0.0):
+        self.lights = list(lights)
+        self.ambient = float(ambient)
+
+    def add(self, light):
+        self.lights.append(light)
+        return self
+
+    def prepare(self, M_view):
+        """
+        計算每個 frame 的常數 (只做一次):
+        1. 點光源位置轉到 view space
+        2. 方向光方向轉到 view space 並正規化
+        """
+        M_view = np.asarray(M_view, dtype=float)
+        points = [l for l in self.lights if isinstance(l, PointLight)]
+        dirs = [l for l in self.lights if isinstance(l, DirectionalLight)]
+
+        point_pos = np.zeros((len(points), 3))
+        for i, l in enumerate(points):
+            if l.space == 'view':
+                point_pos[i] = l.position
+            else:
+                point_pos[i] = (M_view @ np.append(l.position, 1.0))[:3]
+
+        dir_vec = np.zeros((len(dirs), 3))
+        for i, l in enumerate(dirs):
+            # 方向向量只受旋轉影響 (w = 0)
+            dir_vec[i] = l.direction if l.space == 'view' else M_view[:3, :3] @ l.direction
+
+        return FrameLights(
+            point_pos,
+            np.array([l.intensity for l in points], dtype=float),
+            normalize_rows(dir_vec),
+            np.array([l.intensity for l in dirs], dtype=float),
+            self.ambient,
+        )
+
+class FrameLights:
+    """
+    prepare() 的結果: 已轉到 view space 的光源常數
+    """
+    def __init__(self, point_pos, point_intensity, dir_hat, dir_intensity, ambient):
+        self.point_pos = point_pos             # (P, 3)
+        self.point_intensity = point_intensity # (P,)
+        self.dir_hat = dir_hat                 # (D, 3)
+        self.dir_intensity = dir_intensity     # (D,)
+        self.ambient = ambient
+
+    def shade(self, V_xyz, N_hat):
+        """
+        漫反射 + 環境光, 所有頂點與所有光源一次向量化計算
+        V_xyz: (K, 3) view space 頂點座標
+        N_hat: (K, 3) 已正規化法向量
+        回傳 brightness: (K,), clamp 到 1.0
+        """
+        brightness = np.full(len(V_xyz), self.ambient)
+
+        if len(self.point_pos):
+            # L_p' = L_p - V 直接相減 (頂點接近光源時展開式會有 cancellation), 所有光源一次算完: (P, K, 3)
+            L_hat = normalize_rows(self.point_pos[:, np.newaxis, :] - V_xyz[np.newaxis])
+            I_p = np.maximum(0.0, np.einsum('ki,pki->pk', N_hat, L_hat))
+            brightness += self.point_intensity @ I_p
+
+        if len(self.dir_hat):
+            I_d = np.maximum(0.0, N_hat @ self.dir_hat.T)
+            brightness += I_d @ self.dir_intensity
+
+        return np.minimum(1.0, brightness)
@@ -0,0 +1,147 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# ==========================================
+# Out-of-core OBJ 串流 (模型大於記憶體時使用)
+# ==========================================
+"""
+load_obj + normalize_model 需要整個模型都在記憶體中。
+StreamingModel 改成:
+    1. 掃描 OBJ 一次, 把 v / vn / 三角化後的 f 索引分批寫到暫存檔 (記憶體固定)
+    2. 以固定大小的 chunk 掃過 face 索引計算中心點與最大半徑 (與 normalize_model 相同定義)
+    3. iter_chunks() 每次只讀出 chunk_size 個三角形 (已正規化) 給 vertex / raster 使用
+峰值記憶體由 chunk_size 決定, 與模型大小無關。
+"""
+
+DEFAULT_NORMAL = np.array([0.0, 1.0, 0.0])
+
+class StreamingModel:
+    def __init__(self, filename, color, chunk_size=65536, workdir=None):
+        self.filename = filename
+        self.color = np.asarray(color, dtype=float)
+        self.chunk_size = int(chunk_size)
+        self._own_workdir = workdir is None
+        self.workdir = tempfile.mkdtemp(prefix='obj_stream_') if workdir is None else workdir
+        os.makedirs(self.workdir, exist_ok=True)
+
+        self.num_vertices, self.num_normals, self.num_triangles = self._spill()
+        self._vertices = self._open('v.bin', (self.num_vertices, 3))
+        self._normals = self._open('vn.bin', (self.num_normals, 3))
+        self._faces = self._open('f.bin', (self.num_triangles, 6), dtype=np.int64)
+        print(f"Loaded {self.num_triangles} triangles.")
+
+        self.centroid, self.max_dist = self._bounds()
+        self.scale_factor = 1.0 / self.max_dist if self.max_dist > 0 else 1.0
+        print(f"Model Centroid: {self.centroid}, Max Scale: {self.max_dist}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._vertices = self._normals = self._faces = None
+        if self._own_workdir:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+
+    def _open(self, name, shape, dtype=np.float64):
+        # 空檔案無法 memmap, 直接回傳空陣列
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.workdir, name), dtype=dtype, mode='r', shape=shape)
+
+    def _spill(self):
+        """
+        Pass 1: 逐行解析 OBJ, 每累積 chunk_size 筆就寫入暫存檔
+        face 以扇形三角化, 每個三角形存 (v0, n0, v1, n1, v2, n2), 沒有法向量則 n = -1
+        """
+        counts = {'v': 0, 'vn': 0, 'f': 0}
+        bufs = {'v': [], 'vn': [], 'f': []}
+        files = {
+            'v': open(os.path.join(self.workdir, 'v.bin'), 'wb'),
+            'vn': open(os.path.join(self.workdir, 'vn.bin'), 'wb'),
+            'f': open(os.path.join(self.workdir, 'f.bin'), 'wb'),
+        }
+        dtypes = {'v': np.float64, 'vn': np.float64, 'f': np.int64}
+
+        def flush(key):
+            if bufs[key]:
+                np.array(bufs[key], dtype=dtypes[key]).tofile(files[key])
+                counts[key] += len(bufs[key])
+                bufs[key].clear()
+
+        try:
+            with open(self.filename, 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if not parts: continue
+                    key = parts[0]
+                    if key == 'v' or key == 'vn':
+                        bufs[key].append((float(parts[1]), float(parts[2]), float(parts[3])))
+                    elif key == 'f':
+                        face_indices = []
+                        for p in parts[1:]:
+                            vals = p.split('/')
+                            v_idx = int(vals[0]) - 1
+                            n_idx = int(vals[2]) - 1 if len(vals) > 2 and vals[2] else -1
+                            face_indices.append((v_idx, n_idx))
+                        for i in range(1, len(face_indices) - 1):
+                            bufs['f'].append(face_indices[0] + face_indices[i] + face_indices[i + 1])
+                    else:
+                        continue
+                    if len(bufs[key]) >= self.chunk_size:
+                        flush(key)
+            for key in files:
+                flush(key)
+        finally:
+            for fh in files.values():
+                fh.close()
+        return counts['v'], counts['vn'], counts['f']
+
+    def _iter_raw(self):
+        """依序讀出 face 索引 chunk, 並取出對應的 (未正規化) 頂點與法向量"""
+        for start in range(0, self.num_triangles, self.chunk_size):
+            idx = np.asarray(self._faces[start:start + self.chunk_size])
+            v_idx = idx[:, 0::2]
+            n_idx = idx[:, 1::2]
+
+            V = self._vertices[v_idx.ravel()].reshape(-1, 3, 3)
+
+            N = np.empty(V.shape)
+            has_n = (n_idx >= 0) & (n_idx < self.num_normals)
+            N[has_n] = self._normals[n_idx[has_n]]
+            N[~has_n] = DEFAULT_NORMAL
+            yield V, N
+
+    def _bounds(self):
+        """
+        Pass 2: 計算中心點 (所有三角形頂點的平均) 與最大半徑
+        需要先有中心點才能算距離, 所以 face 索引會掃兩次, 但每次只保留一個 chunk
+        """
+        if self.num_triangles == 0:
+            return np.zeros(3), 0.0
+
+        total = np.zeros(3)
+        for V, _ in self._iter_raw():
+            total += V.reshape(-1, 3).sum(axis=0)
+        centroid = total / (3 * self.num_triangles)
+
+        max_dist = 0.0
+        for V, _ in self._iter_raw():
+            d = np.linalg.norm(V.reshape(-1, 3) - centroid, axis=1)
+            max_dist = max(max_dist, float(d.max()))
+        return centroid, max_dist
+
+    def iter_chunks(self):
+        """
+        依序產生已正規化的三角形 chunk:
+        V: (T, 3, 4), N: (T, 3, 3), colors: (T, 3)
+        """
+        for V_raw, N in self._iter_raw():
+            T = len(V_raw)
+            V = np.ones((T, 3, 4))
+            V[:, :, :3] = (V_raw - self.centroid) * self.scale_factor
+            yield V, N, np.broadcast_to(self.color, (T, 3))
@@ -0,0 +1,205 @@
+import os
+import time
+import queue
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from draw import Rasterizer, get_projection, process_triangles, scene_lights
+from obj_stream import StreamingModel
+
+# ==========================================
+# Pipelined 執行: load -> vertex -> raster 三個 stage 同時進行
+# ==========================================
+"""
+render_scene 是逐 stage 執行 (整個檔案解析完 -> 全部做 vertex -> 排序 -> rasterize)。
+這裡改成:
+    parser worker (process) --queue--> vertex worker (主 process) --queue--> raster workers (process x K)
+- stage 之間都是有上限的 queue (queue_depth), 下游跟不上時上游會被擋住 (backpressure), 記憶體固定
+- 每個 raster worker 負責畫面上一條水平帶 (band), canvas / depth buffer 放在 shared memory,
+  vertex worker 只把跟該 band 重疊的三角形送過去, 所以 worker 之間不會寫到同一個像素
+- 使用 depth buffer, 三角形不需要排序
+
+ObjSource 可以直接當作 Instance 的 model: parser worker 在自己的 process 中以 StreamingModel
+讀檔 (spill + 兩次 bounds 掃描, 正規化與 normalize_model / --stream 相同), 再逐 chunk 送出三角形,
+所以畫面與 render_scene_streaming 完全相同。Model / StreamingModel 也可以使用 (直接走 iter_chunks())。
+"""
+
+class ObjSource:
+    def __init__(self, filename, color, chunk_size=4096):
+        self.filename = filename
+        self.color = np.asarray(color, dtype=float)
+        self.chunk_size = int(chunk_size)
+
+def _parse_worker(sources, out_q):
+    """Stage 1: 依序讀取每個 source, 把三角形 chunk 放進 queue"""
+    try:
+        for src_id, src in enumerate(sources):
+            if isinstance(src, ObjSource):
+                with StreamingModel(src.filename, src.color, chunk_size=src.chunk_size) as model:
+                    for V, N, colors in model.iter_chunks():
+                        out_q.put(('chunk', src_id, V, N, colors))
+            else:
+                # Model / StreamingModel: 已正規化
+                for V, N, colors in src.iter_chunks():
+                    out_q.put(('chunk', src_id, V, N, colors))
+        out_q.put(('done',))
+    except Exception as e:
+        out_q.put(('error', repr(e)))
+
+def _raster_worker(shm_names, width, height, y_start, y_end, in_q):
+    """Stage 3: 只負責 [y_start, y_end) 這條 band 的 rasterization"""
+    shm_canvas = shared_memory.SharedMemory(name=shm_names[0])
+    shm_depth = shared_memory.SharedMemory(name=shm_names[1])
+    try:
+        canvas = np.ndarray((height, width, 3), dtype=np.float64, buffer=shm_canvas.buf)
+        depth = np.ndarray((height, width), dtype=np.float64, buffer=shm_depth.buf)
+
+        band = Rasterizer(width, 0, depth_test=True)
+        band.height = y_end - y_start
+        band.canvas = canvas[y_start:y_end]
+        band.depth = depth[y_start:y_end]
+
+        while True:
+            item = in_q.get()
+            if item is None: break
+            pts, colors = item
+            pts[:, :, 1] -= y_start
+            for t in range(len(pts)):
+                band.draw_shaded_triangle(pts[t, 0], pts[t, 1], pts[t, 2], colors[t])
+        del canvas, depth, band
+    finally:
+        shm_canvas.close()
+        shm_depth.close()
+
+def _check_workers(procs):
+    for p in procs:
+        if not p.is_alive() and p.exitcode not in (0, None):
+            raise RuntimeError(f"pipeline worker {p.name} exited with code {p.exitcode}")
+
+def _get(q, procs):
+    while True:
+        try:
+            return q.get(timeout=0.5)
+        except queue.Empty:
+            _check_workers(procs)
+
+def _put(q, item, procs):
+    # 下游已滿時等待 (backpressure), 但若有 worker 異常結束則不要永遠卡住
+    while True:
+        try:
+            q.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            _check_workers(procs)
+
+def render_scene_pipelined(camera, instances, width, height, lights=None,
+                           raster_workers=None, queue_depth=4, fmt=None):
+    """
+    Pipelined 版 render_scene (結果與 render_scene_streaming 相同, 使用 depth buffer)
+    raster_workers: raster process 數量 (預設 CPU 數 - 1)
+    queue_depth: 每個 queue 最多暫存的 chunk 數
+    fmt: 同 render_scene
+    """
+    width, height = int(width), int(height)
+    if raster_workers is None:
+        raster_workers = max(1, (os.cpu_count() or 2) - 1)
+    raster_workers = max(1, min(raster_workers, height))
+
+    M_view = camera.get_view_matrix()
+    if lights is None:
+        lights = scene_lights
+    frame_lights = lights.prepare(M_view)
+    projection = get_projection(width, height)
+
+    # 同一個 model 只解析一次, 再套用到所有使用它的 instance
+    sources = []
+    for inst in instances:
+        if not any(inst.model is s for s in sources):
+            sources.append(inst.model)
+    src_instances = [[inst for inst in instances if inst.model is s] for s in sources]
+
+    nbytes_canvas = height * width * 3 * 8
+    nbytes_depth = height * width * 8
+    shm_canvas = shared_memory.SharedMemory(create=True, size=max(1, nbytes_canvas))
+    shm_depth = shared_memory.SharedMemory(create=True, size=max(1, nbytes_depth))
+    procs = []
+    try:
+        canvas = np.ndarray((height, width, 3), dtype=np.float64, buffer=shm_canvas.buf)
+        depth = np.ndarray((height, width), dtype=np.float64, buffer=shm_depth.buf)
+        canvas[:] = 0.0
+        depth[:] = 0.0
+
+        print("Rendering (pipelined)...")
+        t_start = time.perf_counter()
+
+        parse_q = mp.Queue(maxsize=queue_depth)
+        parser = mp.Process(target=_parse_worker, args=(sources, parse_q), name='parser', daemon=True)
+        procs.append(parser)
+
+        bounds = np.linspace(0, height, raster_workers + 1).astype(int)
+        raster_qs = []
+        for k in range(raster_workers):
+            q = mp.Queue(maxsize=queue_depth)
+            p = mp.Process(target=_raster_worker,
+                           args=((shm_canvas.name, shm_depth.name), width, height,
+                                 bounds[k], bounds[k + 1], q),
+                           name=f'raster{k}', daemon=True)
+            raster_qs.append(q)
+            procs.append(p)
+        for p in procs:
+            p.start()
+
+        # Stage 2: vertex worker (主 process)
+        first_pixel = None
+        num_triangles = 0
+        while True:
+            item = _get(parse_q, procs)
+            kind = item[0]
+            if kind == 'done':
+                break
+            if kind == 'error':
+                raise RuntimeError(f"pipeline parser failed: {item[1]}")
+
+            _, src_id, V, N, colors = item
+            for inst in src_instances[src_id]:
+                M_MV = M_view @ inst.transform_matrix
+                screen_x, screen_y, bright, inv_pz, _, valid = process_triangles(V, N, M_MV, projection, frame_lights,
+                                                                                 fmt)
+                pts = np.stack([screen_x, screen_y, bright, inv_pz], axis=-1)[valid]
+                tri_colors = np.asarray(colors)[valid]
+                num_triangles += len(pts)
+
+                # 依 band 分送 (與 draw_shaded_triangle 相同的 y 取整方式)
+                y_round = np.round(pts[:, :, 1])
+                y_min, y_max = y_round.min(axis=1), y_round.max(axis=1)
+                for k, q in enumerate(raster_qs):
+                    sel = (y_max >= bounds[k]) & (y_min < bounds[k + 1])
+                    if np.any(sel):
+                        _put(q, (pts[sel], tri_colors[sel]), procs)
+                        if first_pixel is None:
+                            first_pixel = time.perf_counter() - t_start
+
+        for q in raster_qs:
+            _put(q, None, procs)
+        for p in procs:
+            p.join()
+            if p.exitcode != 0:
+                raise RuntimeError(f"pipeline worker {p.name} exited with code {p.exitcode}")
+
+        elapsed = time.perf_counter() - t_start
+        if first_pixel is not None:
+            print(f"First raster work after {first_pixel:.3f}s")
+        print(f"Pipelined render: {num_triangles} triangles, {raster_workers} raster workers, {elapsed:.3f}s")
+
+        image = canvas.copy()
+        del canvas, depth
+        return image
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        shm_canvas.close()
+        shm_canvas.unlink()
+        shm_depth.close()
+        shm_depth.unlink()
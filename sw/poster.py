@@ -0,0 +1,308 @@
+import os
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
+import numpy as np
+
+from draw import Rasterizer, get_projection, process_triangles, scene_lights
+
+# ==========================================
+# 大尺寸輸出 (poster): 分 tile 渲染到 memory-mapped framebuffer
+# ==========================================
+"""
+Rasterizer 把整張 float 畫布放在記憶體中, 16k x 16k 就需要數 GB。
+render_poster 改成:
+    1. Vertex stage 只做一次, 投影後的三角形 (x, y, h, 1/z) + 顏色依 bbox 分到每個 tile 的暫存檔
+       (跨 tile 的三角形寫進每個重疊的 tile), 每個 tile 只讀自己的三角形
+    2. 一次只 rasterize 一個 tile (每個 tile 有自己的 canvas / depth buffer),
+       完成後轉成 uint8 寫進 memory-mapped framebuffer (只 map 該 tile 所在的列)
+    3. 每完成一整列 tile (strip) 就交給背景 thread 做 PNG / TIFF 編碼, 邊渲染邊寫檔
+峰值記憶體約為一個 tile 的大小 (加上一個 chunk 的三角形)。
+"""
+
+# 每個投影後三角形的紀錄: 3 個頂點 (x, y, h, 1/z) + 顏色 RGB
+_RECORD = 3 * 4 + 3
+
+class _PngWriter:
+    """逐 strip 寫入的 PNG encoder (8-bit RGB, 每列 filter 0, zlib 串流壓縮)"""
+    def __init__(self, f, width, height, level=6):
+        self.f = f
+        f.write(b'\x89PNG\r\n\x1a\n')
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        self._z = zlib.compressobj(level)
+
+    def _chunk(self, tag, data):
+        self.f.write(struct.pack('>I', len(data)))
+        self.f.write(tag)
+        self.f.write(data)
+        self.f.write(struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+    def write_rows(self, rows):
+        raw = np.zeros((rows.shape[0], rows.shape[1] * 3 + 1), dtype=np.uint8)
+        raw[:, 1:] = rows.reshape(rows.shape[0], -1)
+        data = self._z.compress(raw.tobytes())
+        if data:
+            self._chunk(b'IDAT', data)
+
+    def end_strip(self):
+        pass
+
+    def close(self):
+        self._chunk(b'IDAT', self._z.flush())
+        self._chunk(b'IEND', b'')
+
+class _TiffWriter:
+    """逐 strip 寫入的 baseline TIFF (未壓縮 RGB, 一個 tile 列 = 一個 TIFF strip)"""
+    def __init__(self, f, width, height, rows_per_strip):
+        self.f = f
+        self.width, self.height, self.rows_per_strip = width, height, rows_per_strip
+        f.write(b'II*\x00' + struct.pack('<I', 0)) # IFD offset 最後再補
+        self.offsets = []
+        self.counts = []
+
+    def write_rows(self, rows):
+        if len(self.offsets) == len(self.counts):
+            self.offsets.append(self.f.tell())
+        self.f.write(np.ascontiguousarray(rows).tobytes())
+
+    def end_strip(self):
+        self.counts.append(self.f.tell() - self.offsets[-1])
+
+    def close(self):
+        f = self.f
+
+        def out_of_line(fmt, values):
+            # 放不進 4 bytes 的欄位寫在 IFD 之前
+            if f.tell() % 2: f.write(b'\0')
+            pos = f.tell()
+            f.write(struct.pack('<%d%s' % (len(values), fmt), *values))
+            return pos
+
+        bits = out_of_line('H', [8, 8, 8])
+        n = len(self.offsets)
+        offs = self.offsets[0] if n == 1 else out_of_line('I', self.offsets)
+        cnts = self.counts[0] if n == 1 else out_of_line('I', self.counts)
+
+        SHORT, LONG = 3, 4
+        entries = [
+            (256, LONG, 1, self.width),
+            (257, LONG, 1, self.height),
+            (258, SHORT, 3, bits),
+            (259, SHORT, 1, 1),        # no compression
+            (262, SHORT, 1, 2),        # RGB
+            (273, LONG, n, offs),
+            (277, SHORT, 1, 3),
+            (278, LONG, 1, self.rows_per_strip),
+            (279, LONG, n, cnts),
+            (284, SHORT, 1, 1),        # chunky
+        ]
+        if f.tell() % 2: f.write(b'\0')
+        ifd = f.tell()
+        f.write(struct.pack('<H', len(entries)))
+        for tag, typ, count, value in entries:
+            if typ == SHORT and count == 1:
+                f.write(struct.pack('<HHIHH', tag, typ, count, value, 0))
+            else:
+                f.write(struct.pack('<HHII', tag, typ, count, value))
+        f.write(struct.pack('<I', 0))
+        f.seek(4)
+        f.write(struct.pack('<I', ifd))
+
+def _encoder(fb_path, width, out_path, writer_cls, writer_args, strips, rows_per_read):
+    """背景 thread: 從 framebuffer 檔案讀出完成的 strip 並編碼 (用檔案讀取, 不 map 整張圖)"""
+    row_bytes = width * 3
+    # 不用 buffered reader: 預讀的資料可能是下一個 strip 尚未渲染前的內容
+    # (buffering=0 的 FileIO 只讀要求的範圍; 不用 os.pread / preadv, Windows 沒有)
+    with open(fb_path, 'rb', buffering=0) as fb, open(out_path, 'wb') as f:
+        writer = writer_cls(f, width, *writer_args)
+        buf = bytearray(rows_per_read * row_bytes)
+        while True:
+            item = strips.get()
+            if item is None: break
+            y0, y1 = item
+            for y in range(y0, y1, rows_per_read):
+                n = min(rows_per_read, y1 - y)
+                view = memoryview(buf)[:n * row_bytes]
+                fb.seek(y * row_bytes)
+                got = 0
+                while got < len(view):
+                    k = fb.readinto(view[got:])
+                    if not k:
+                        raise IOError(f"short read from framebuffer {fb_path}")
+                    got += k
+                writer.write_rows(np.frombuffer(view, dtype=np.uint8).reshape(n, width, 3))
+            writer.end_strip()
+        writer.close()
+
+def _tile_path(spill_dir, tile_id):
+    return os.path.join(spill_dir, f"{tile_id}.bin")
+
+def _spill_triangles(spill_dir, camera, instances, width, height, tile_size, lights, fmt=None):
+    """
+    Vertex stage (只做一次): 投影後的三角形依 tile 分組寫到 spill_dir/<tile 編號>.bin
+    tile 編號 = tile 列 * tile 欄數 + tile 欄; 同一個 tile 內保持原本的三角形順序
+    回傳 (三角形數, 每個 tile 的紀錄數)
+    """
+    M_view = camera.get_view_matrix()
+    if lights is None:
+        lights = scene_lights
+    frame_lights = lights.prepare(M_view)
+    projection = get_projection(width, height)
+    cols = (width + tile_size - 1) // tile_size
+    rows = (height + tile_size - 1) // tile_size
+    tile_counts = np.zeros(rows * cols, dtype=np.int64)
+
+    count = 0
+    for instance in instances:
+        M_MV = M_view @ instance.transform_matrix
+        for V, N, colors in instance.model.iter_chunks():
+            screen_x, screen_y, bright, inv_pz, _, valid = process_triangles(V, N, M_MV, projection, frame_lights,
+                                                                             fmt)
+            T = int(valid.sum())
+            if T == 0: continue
+            rec = np.empty((T, _RECORD))
+            rec[:, 0:12] = np.stack([screen_x, screen_y, bright, inv_pz], axis=-1)[valid].reshape(T, 12)
+            rec[:, 12:15] = np.asarray(colors)[valid]
+            # bbox 以 draw_shaded_triangle 的取整方式計算
+            xs, ys = np.round(screen_x[valid]), np.round(screen_y[valid])
+            xmin, xmax, ymin, ymax = xs.min(axis=1), xs.max(axis=1), ys.min(axis=1), ys.max(axis=1)
+            # 整張圖外的三角形不需要保留
+            on_screen = (xmax >= 0) & (xmin < width) & (ymax >= 0) & (ymin < height)
+            if not np.any(on_screen): continue
+            rec = rec[on_screen]
+            count += len(rec)
+
+            # 每個三角形重疊的 tile 範圍 -> (三角形, tile) 配對
+            tx0 = np.maximum(xmin[on_screen], 0).astype(np.int64) // tile_size
+            tx1 = np.minimum(xmax[on_screen], width - 1).astype(np.int64) // tile_size
+            ty0 = np.maximum(ymin[on_screen], 0).astype(np.int64) // tile_size
+            ty1 = np.minimum(ymax[on_screen], height - 1).astype(np.int64) // tile_size
+            nx, ny = tx1 - tx0 + 1, ty1 - ty0 + 1
+            n_pairs = nx * ny
+            tri = np.repeat(np.arange(len(rec)), n_pairs)
+            k = np.arange(len(tri)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+            tile_id = (ty0[tri] + k // nx[tri]) * cols + tx0[tri] + k % nx[tri]
+
+            # stable sort: tile 內維持三角形順序
+            order = np.argsort(tile_id, kind='stable')
+            tri, tile_id = tri[order], tile_id[order]
+            ids, starts = np.unique(tile_id, return_index=True)
+            ends = np.append(starts[1:], len(tile_id))
+            for t_id, s, e in zip(ids, starts, ends):
+                with open(_tile_path(spill_dir, t_id), 'ab') as f:
+                    rec[tri[s:e]].tofile(f)
+                tile_counts[t_id] += e - s
+    return count, tile_counts
+
+def render_poster(camera, instances, width, height, out_path, tile_size=1024, lights=None,
+                  chunk_size=65536, framebuffer_path=None, fmt=None):
+    """
+    分 tile 渲染大尺寸圖片並邊渲染邊輸出 PNG (.png) 或 TIFF (.tif / .tiff)
+    instance.model 需提供 iter_chunks() (Model 或 obj_stream.StreamingModel)
+    framebuffer_path: uint8 framebuffer 檔案位置; None 則使用暫存檔並在結束後刪除
+    fmt: floatfmt.FloatFormat, vertex stage 使用的浮點格式 (None 為 float64)
+    """
+    width, height, tile_size = int(width), int(height), int(tile_size)
+    ext = os.path.splitext(out_path)[1].lower()
+    if ext == '.png':
+        writer_cls, writer_args = _PngWriter, (height,)
+    elif ext in ('.tif', '.tiff'):
+        writer_cls, writer_args = _TiffWriter, (height, tile_size)
+    else:
+        raise ValueError(f"unsupported poster format: {out_path} (use .png / .tif)")
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    own_fb = framebuffer_path is None
+    if own_fb:
+        fd, framebuffer_path = tempfile.mkstemp(prefix='poster_fb_', dir=out_dir)
+        os.close(fd)
+    spill_dir = tempfile.mkdtemp(prefix='poster_tri_', dir=out_dir)
+
+    print(f"Rendering poster {width}x{height} in {tile_size}x{tile_size} tiles...")
+    strips = queue.Queue(maxsize=2)
+    encoder = None
+    errors = []
+    try:
+        with open(framebuffer_path, 'wb') as fb:
+            fb.truncate(width * height * 3)
+
+        num_triangles, tile_counts = _spill_triangles(spill_dir, camera, instances, width, height, tile_size,
+                                                      lights, fmt)
+        print(f"Projected {num_triangles} on-screen triangles "
+              f"({int(tile_counts.sum())} tile entries).")
+
+        def run_encoder():
+            try:
+                _encoder(framebuffer_path, width, out_path, writer_cls, writer_args, strips,
+                         rows_per_read=max(1, (1 << 20) // (width * 3)))
+            except BaseException as e:
+                errors.append(e)
+
+        def put_strip(item):
+            # queue 滿時等待 encoder (backpressure), encoder 失敗則直接丟出錯誤
+            while True:
+                if errors:
+                    raise errors[0]
+                try:
+                    strips.put(item, timeout=0.5)
+                    return
+                except queue.Full:
+                    pass
+
+        encoder = threading.Thread(target=run_encoder, name='poster-encoder', daemon=True)
+        encoder.start()
+
+        cols = (width + tile_size - 1) // tile_size
+        for ty in range(0, height, tile_size):
+            th = min(tile_size, height - ty)
+            for tx in range(0, width, tile_size):
+                tw = min(tile_size, width - tx)
+                tile = Rasterizer(tw, th, depth_test=True)
+
+                # 只讀這個 tile 的三角形
+                tile_id = (ty // tile_size) * cols + tx // tile_size
+                n_tile = int(tile_counts[tile_id])
+                if n_tile:
+                    with open(_tile_path(spill_dir, tile_id), 'rb') as spill:
+                        for start in range(0, n_tile, chunk_size):
+                            rec = np.fromfile(spill, dtype=np.float64,
+                                              count=min(chunk_size, n_tile - start) * _RECORD)
+                            rec = rec.reshape(-1, _RECORD)
+                            pts = rec[:, 0:12].reshape(-1, 3, 4)
+                            pts[:, :, 0] -= tx
+                            pts[:, :, 1] -= ty
+                            colors = rec[:, 12:15]
+                            for t in range(len(pts)):
+                                tile.draw_shaded_triangle(pts[t, 0], pts[t, 1], pts[t, 2], colors[t])
+                    os.remove(_tile_path(spill_dir, tile_id))
+
+                # 只 map 這個 tile 所在的列
+                fb = np.memmap(framebuffer_path, dtype=np.uint8, mode='r+',
+                               offset=ty * width * 3, shape=(th, width, 3))
+                fb[:, tx:tx + tw] = np.round(np.clip(tile.canvas, 0.0, 1.0) * 255).astype(np.uint8)
+                fb.flush()
+                del fb, tile
+
+            put_strip((ty, ty + th))
+            print(f"  strip {ty // tile_size + 1}/{(height + tile_size - 1) // tile_size} done")
+
+        put_strip(None)
+        encoder.join()
+        if errors:
+            raise errors[0]
+        print(f"Poster saved to: {out_path}")
+        return out_path
+    finally:
+        if encoder is not None and encoder.is_alive():
+            # 中途失敗: 讓 encoder 結束 (輸出檔不完整)
+            try:
+                strips.put(None, timeout=5)
+            except queue.Full:
+                pass
+            encoder.join(timeout=5)
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        if own_fb and os.path.exists(framebuffer_path):
+            os.remove(framebuffer_path)
@@ -0,0 +1,39 @@
+import numpy as np
+
+from draw import Rasterizer
+
+# ==========================================
+# Rasterizer.draw_lines 與逐條 draw_line 畫出的像素必須完全相同
+# ==========================================
+
+def _random_lines(n, seed):
+    rng = np.random.default_rng(seed)
+    p0 = rng.uniform(-20, 120, (n, 2))
+    p1 = rng.uniform(-20, 120, (n, 2))
+    # 一半的端點放在半像素上, 測試取整的平手情況; 另外加入 |dx| == |dy| 與單點的線
+    half = rng.random(n) < 0.5
+    p0[half] = np.round(p0[half] * 2) / 2
+    p1[half] = np.round(p1[half] * 2) / 2
+    p1[:n // 20] = p0[:n // 20] + rng.integers(-30, 30, (n // 20, 1))
+    p1[n // 20:n // 10] = p0[n // 20:n // 10]
+    return p0, p1
+
+def _draw_each(p0, p1, size=100):
+    r = Rasterizer(size, size)
+    for a, b in zip(p0, p1):
+        r.draw_line(a, b, (1.0, 1.0, 1.0))
+    return r.canvas
+
+def test_draw_lines_matches_draw_line_per_line():
+    p0, p1 = _random_lines(2000, seed=0)
+    for k in range(len(p0)):
+        ref = _draw_each(p0[k:k + 1], p1[k:k + 1])
+        r = Rasterizer(100, 100)
+        r.draw_lines(p0[k:k + 1], p1[k:k + 1], (1.0, 1.0, 1.0))
+        assert np.array_equal(r.canvas, ref), f"line {k}: {p0[k]} -> {p1[k]}"
+
+def test_draw_lines_matches_draw_line_batch():
+    p0, p1 = _random_lines(2000, seed=1)
+    r = Rasterizer(100, 100)
+    r.draw_lines(p0, p1, (1.0, 1.0, 1.0))
+    assert np.array_equal(r.canvas, _draw_each(p0, p1))
@@ -0,0 +1,168 @@
+import os
+import sys
+import argparse
+import math
+
+# ==========================================
+# 硬體工作量估算: 由軟體 render 統計 vertex stage 的運算量
+# ==========================================
+"""
+render_scene(..., counter=WorkloadCounter()) 會在每個 frame 記錄 vertex stage 送出的頂點數與光源數,
+再換算成硬體要執行的運算:
+    mv      : mv_mul_4x4_fp32 (V' = M_MV * V, 以及法向量轉換 M_MV[:3,:3] * N, w = 0)
+    norm    : fp32_normalize3 (N, 每個點光源的 L_p')
+    dot     : 獨立的 fp32_dot3 (N·L)
+    inv_sqrt: 獨立的 fast_inv_sqrt (1/sqrt(z^2))
+    mul/add : 不屬於以上單元的 fp32_mul / fp32_addsub
+以及 gen_vtx 格式的輸入 / 輸出資料量。
+每個單元都是 fully pipelined (每 cycle 一筆), 所以需要的單元數 = ceil(每秒運算數 / clock)。
+"""
+
+# 每種單元內部的純量運算數 (mul, add), 對應 src/*.sv
+UNIT_SCALAR_OPS = {
+    'mv':       (16, 12),    # 16 fp32_mul + 3 層加法樹 x 4 列
+    'dot':      (3, 2),
+    'inv_sqrt': (4, 1),      # x*0.5, y*y, x2*yy, y*(1.5 - t) / 1 sub
+    'norm':     (3 + 3 + 4, 2 + 1),  # dot3 + fast_inv_sqrt + 3 mul
+    'mul':      (1, 0),
+    'add':      (0, 1),
+}
+
+UNIT_MODULES = {
+    'mv': 'mv_mul_4x4_fp32',
+    'norm': 'fp32_normalize3',
+    'dot': 'fp32_dot3',
+    'inv_sqrt': 'fast_inv_sqrt',
+    'mul': 'fp32_mul',
+    'add': 'fp32_addsub',
+}
+
+# gen_vtx.py 的資料格式 (32-bit words)
+VTX_IN_WORDS = 8        # id, Vx, Vy, Vz, Vw, Nx, Ny, Nz
+VTX_OUT_WORDS = 4       # Px, Py, 1/Pz, Brightness
+VTX_HEADER_WORDS = 28   # N, MV (16), Lp (3), Ld (3), 3 intensities, Pscale_x/y
+VTX_OUT_HEADER_WORDS = 1  # N
+
+def vertex_ops(n_point, n_dir):
+    """每個頂點的單元運算數 (與 vertex_processing_batch 相同的步驟)"""
+    return {
+        'mv': 2,                     # V' 與法向量轉換
+        'norm': 1 + n_point,         # N_hat, 每個點光源的 L_p' 正規化
+        'dot': n_point + n_dir,      # N·L
+        'inv_sqrt': 1,               # 1/sqrt(z^2)
+        'mul': 1 + 4 + n_point + n_dir,       # z*z, Px/Py 各 2 個, 每個光源乘強度
+        'add': 3 * n_point + n_point + n_dir, # L_p - V', 亮度累加
+    }
+
+def frame_ops(n_dir):
+    """每個 frame 只做一次的運算 (方向光正規化已提到 frame 常數)"""
+    return {'norm': n_dir}
+
+class WorkloadCounter:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.vertices = 0
+        self.instances = 0
+        self.triangles = 0
+        self.visible_triangles = 0
+        self.ops = {k: 0 for k in UNIT_SCALAR_OPS}
+
+    def begin_frame(self, frame_lights):
+        self.frames += 1
+        self._n_point = len(frame_lights.point_pos)
+        self._n_dir = len(frame_lights.dir_hat)
+        for k, v in frame_ops(self._n_dir).items():
+            self.ops[k] += v
+
+    def add_instance(self):
+        # 每個 instance 要重新載入一次 gen_vtx 的 header (MV 矩陣 / 光源 / 投影參數)
+        self.instances += 1
+
+    def add_triangles(self, num_triangles, num_visible, num_vertices=None):
+        # 預設以三角形為單位送出頂點 (每個三角形 3 個頂點, 沒有 index 共用)
+        # num_vertices: IndexedModel 的不重複頂點數 (每個頂點只送一次)
+        n = 3 * num_triangles if num_vertices is None else num_vertices
+        self.triangles += num_triangles
+        self.visible_triangles += num_visible
+        self.vertices += n
+        for k, v in vertex_ops(self._n_point, self._n_dir).items():
+            self.ops[k] += v * n
+
+    def scalar_ops(self):
+        mul = sum(UNIT_SCALAR_OPS[k][0] * v for k, v in self.ops.items())
+        add = sum(UNIT_SCALAR_OPS[k][1] * v for k, v in self.ops.items())
+        return mul, add
+
+    def report(self, fps, clock_mhz):
+        """每個 frame 的平均工作量, 以及在 fps / clock 下需要的單元數與頻寬"""
+        frames = max(self.frames, 1)
+        clock_hz = clock_mhz * 1e6
+        per_frame = {k: v / frames for k, v in self.ops.items()}
+        utilization = {k: v * fps / clock_hz for k, v in per_frame.items()}
+        units = {k: math.ceil(u) for k, u in utilization.items()}
+        mul, add = self.scalar_ops()
+
+        verts = self.vertices / frames
+        in_bytes = 4 * (VTX_IN_WORDS * verts + VTX_HEADER_WORDS * self.instances / frames)
+        out_bytes = 4 * (VTX_OUT_WORDS * verts + VTX_OUT_HEADER_WORDS * self.instances / frames)
+        return {
+            'vertices_per_frame': verts,
+            'triangles_per_frame': self.triangles / frames,
+            'visible_triangles_per_frame': self.visible_triangles / frames,
+            'ops_per_frame': per_frame,
+            'scalar_mul_per_frame': mul / frames,
+            'scalar_add_per_frame': add / frames,
+            'utilization': utilization,
+            'units': units,
+            'in_bytes_per_vertex': 4 * VTX_IN_WORDS,
+            'out_bytes_per_vertex': 4 * VTX_OUT_WORDS,
+            'in_bandwidth_MBps': in_bytes * fps / 1e6,
+            'out_bandwidth_MBps': out_bytes * fps / 1e6,
+        }
+
+def format_report(name, r, fps, clock_mhz):
+    lines = [f"== {name}: {r['vertices_per_frame']:.0f} vertices/frame "
+             f"({r['triangles_per_frame']:.0f} triangles, {r['visible_triangles_per_frame']:.0f} after clipping)"]
+    lines.append(f"   target {fps:g} fps @ {clock_mhz:g} MHz")
+    lines.append(f"   {'unit':18s} {'ops/frame':>12s} {'ops/s':>14s} {'units':>6s} {'busy':>8s}")
+    for k, v in r['ops_per_frame'].items():
+        units = r['units'][k]
+        busy = r['utilization'][k] / units if units else 0.0
+        lines.append(f"   {UNIT_MODULES[k]:18s} {v:12.0f} {v * fps:14.4g} {units:6d} {busy:8.2%}")
+    lines.append(f"   scalar fp32 mul/frame {r['scalar_mul_per_frame']:.0f}, add/frame {r['scalar_add_per_frame']:.0f}")
+    lines.append(f"   I/O per vertex: in {r['in_bytes_per_vertex']} B, out {r['out_bytes_per_vertex']} B; "
+                 f"bandwidth in {r['in_bandwidth_MBps']:.2f} MB/s, out {r['out_bandwidth_MBps']:.2f} MB/s")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    import draw
+
+    parser = argparse.ArgumentParser(description='estimate vertex-stage hardware workload from software renders')
+    parser.add_argument('models', nargs='*', help='model names (default: every .obj in ./models)')
+    parser.add_argument('--fps', type=float, default=60.0, help='target frame rate')
+    parser.add_argument('--clock-mhz', type=float, default=1000.0, help='hardware clock (default: 1 ns cycle)')
+    parser.add_argument('--width', type=int, default=160, help='canvas width used for the counting render')
+    parser.add_argument('--height', type=int, default=120, help='canvas height used for the counting render')
+    args = parser.parse_args()
+
+    model_dir = './models'
+    names = args.models or sorted(os.path.splitext(f)[0] for f in os.listdir(model_dir) if f.endswith('.obj'))
+
+    for name in names:
+        triangles = draw.load_obj(os.path.join(model_dir, name + '.obj'))
+        if not triangles:
+            continue
+        normalized_triangles = draw.normalize_model(triangles)
+        for tri in normalized_triangles:
+            tri[3] = draw.color
+        model = draw.Model(normalized_triangles)
+        camera = draw.Camera(position=draw.camera_position, rotation_y=0)
+        instances = [draw.Instance(model, position=draw.instance_position, scale=draw.scale,
+                                   rotation_y=draw.view_angle)]
+        counter = WorkloadCounter()
+        draw.render_scene(camera, instances, args.width, args.height, counter=counter)
+        print(format_report(name, counter.report(args.fps, args.clock_mhz), args.fps, args.clock_mhz))
+        sys.stdout.flush()